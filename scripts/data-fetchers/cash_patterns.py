@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Cash / Liquidity Regex Patterns
+
+Compiled once and shared by widget_data_worker (live) and
+cash_position_worker (disabled), so both parse 10-Q/10-K and transcript
+text identically and a pattern fix lands in one place.
+"""
+
+import re
+
+# Thousands separators dropped before int()/float() — one translate table
+# instead of a str.replace scan per captured number
+STRIP_COMMAS = str.maketrans('', '', ',')
+
+# 10-Q/10-K balance sheet + cash flow line items (searched against the
+# original-case filing text). Each starts with a literal, so re jumps
+# straight to candidate positions.
+CASH_EQ = re.compile(r'Cash and cash equivalents\s+\$\s*([\d,]+)')
+RESTRICTED = re.compile(r'Restricted cash\s+(\d[\d,]*)')
+TOTAL_CASH_RESTRICTED = re.compile(r'Cash, cash equivalents and restricted cash\s+\$\s*([\d,]+)')
+# Case-insensitive: also matches "Net cash used in operating activities".
+# re.ASCII limits case folding to ASCII — ~2x faster on a 2.5MB filing and
+# safe here: filing_worker collapses all Unicode whitespace to " " when it
+# builds content_text.
+OP_BURN = re.compile(r'Cash used in operating activities\s*\(?\s*([\d,]+)', re.IGNORECASE | re.ASCII)
+
+# Liquidity patterns below are lowercase and run against content.lower() —
+# cheaper than re.IGNORECASE case-folding every character comparison.
+
+# "$X million of cash ... on hand" and "$X million remaining ... ATM" share
+# their "$X million" prefix, so it is matched once and the two tails are
+# tried in a lookahead (zero-width, so neither can swallow the other's match).
+# Gaps are bounded and can't cross a line (or a "$" for pro forma), so a
+# non-matching anchor fails fast instead of scanning the rest of the filing.
+LIQUIDITY = re.compile(
+    r'\$([\d,.]+)\s*(million|billion)\s+(?='
+    r'(?P<on_hand>(?:of\s+)?cash(?:\s+and\s+cash\s+equivalents)?\s+on\s+hand)'
+    r'|(?P<atm>remaining[^\n]{0,80}?(?:atm|at[- ]the[- ]market)))'
+)
+PRO_FORMA = re.compile(
+    r'(?:pro\s*forma|including)[^\n$]{0,200}?(?:cash|liquidity)[^\n$]{0,200}?\$([\d,.]+)\s*(billion|million)'
+)
+
+# Earnings call transcripts: "$X.X billion" in context of pro forma /
+# liquidity / cash, tried in order. Each is paired with a literal it can't
+# match without; a substring test on that literal is far cheaper than a
+# failing regex scan, and most transcripts only contain some of them.
+# Lowercase, run against transcript.lower().
+TRANSCRIPT_PRO_FORMA = tuple((keyword, re.compile(pattern)) for keyword, pattern in (
+    # "$3.2 billion in cash and liquidity ... pro forma"
+    ('billion', r'\$([\d.]+)\s*billion\s+(?:in\s+)?(?:cash(?:\s+and\s+(?:cash\s+equivalents|liquidity))?|pro\s*forma)'),
+    # "pro forma ... $3.2 billion"
+    ('forma', r'pro\s*forma.*?\$([\d.]+)\s*billion'),
+    # "cash, cash equivalents, and restricted cash and available liquidity ... $X.X billion"
+    ('restricted cash', r'cash[,\s]+cash equivalents[,\s]+(?:and\s+)?restricted cash.*?\$([\d.]+)\s*billion'),
+    # "$X.X billion on a pro forma basis"
+    ('forma', r'\$([\d.]+)\s*billion\s+on\s+a\s+pro\s*forma\s+basis'),
+))
@@ -15,14 +15,34 @@ sys.exit(0)
 
 import os
 import json
-import re
 import urllib.request
 import urllib.parse
 from datetime import datetime, timezone
 
+from cash_patterns import (
+    CASH_EQ,
+    LIQUIDITY,
+    OP_BURN,
+    PRO_FORMA,
+    RESTRICTED,
+    STRIP_COMMAS,
+    TOTAL_CASH_RESTRICTED,
+)
+
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY')
 
+# Balance sheet + cash flow line items: (cash_position column, pattern, log label).
+# Searched one by one rather than as a single alternation — each pattern
+# starts with a literal, so re jumps straight to candidate positions; a
+# union of the four measured ~3x slower on a 2.5MB filing.
+STATEMENT_LINE_ITEMS = (
+    ('cash_and_equivalents', CASH_EQ, 'Cash & equivalents'),
+    ('restricted_cash', RESTRICTED, 'Restricted cash'),
+    ('total_cash_restricted', TOTAL_CASH_RESTRICTED, 'Total cash+restricted'),
+    ('quarterly_burn', OP_BURN, 'Quarterly burn'),
+)
+
 
 def supabase_request(path, method='GET', data=None):
     url = f"{SUPABASE_URL}/rest/v1/{path}"
@@ -73,83 +93,53 @@ def extract_cash_data(content, form, filing_date, accession):
         'unit': 'thousands',
     }
 
-    # 1. Balance sheet: "Cash and cash equivalents $ X"
-    m = re.search(
-        r'Cash and cash equivalents\s+\$\s*([\d,]+)',
-        content
-    )
-    if m:
-        data['cash_and_equivalents'] = int(m.group(1).replace(',', ''))
-        print(f"  Cash & equivalents: ${data['cash_and_equivalents']:,}K")
-
-    # 2. Restricted cash from balance sheet
-    m = re.search(
-        r'Restricted cash\s+(\d[\d,]*)',
-        content
-    )
-    if m:
-        data['restricted_cash'] = int(m.group(1).replace(',', ''))
-        print(f"  Restricted cash: ${data['restricted_cash']:,}K")
+    # 1-3. Balance sheet ("Cash and cash equivalents $ X", restricted cash),
+    # cash flow statement total, and quarterly burn ("Cash used in operating activities (X)")
+    for column, pattern, label in STATEMENT_LINE_ITEMS:
+        m = pattern.search(content)
+        if m:
+            data[column] = int(m.group(1).translate(STRIP_COMMAS))
+            print(f"  {label}: ${data[column]:,}K")
 
-    # 3. Cash flow statement: "Cash, cash equivalents and restricted cash $ X"
-    m = re.search(
-        r'Cash, cash equivalents and restricted cash\s+\$\s*([\d,]+)',
-        content
-    )
-    if m:
-        data['total_cash_restricted'] = int(m.group(1).replace(',', ''))
-        print(f"  Total cash+restricted: ${data['total_cash_restricted']:,}K")
+    # The liquidity patterns below have no literal prefix, so re can't skip
+    # ahead — gate each on a required keyword, then search the lowered text
+    content_lower = content.lower() if '$' in content else ''
 
     # 4. Liquidity disclosure: "$X million of cash ... on hand" + ATM remaining
     liquidity = 0
     label_parts = []
 
-    m = re.search(
-        r'\$([\d,.]+)\s*(?:million|billion)\s+(?:of\s+)?cash(?:\s+and\s+cash\s+equivalents)?\s+on\s+hand',
-        content, re.IGNORECASE
-    )
-    if m:
-        val = float(m.group(1).replace(',', ''))
-        # Check if billion
-        if 'billion' in content[m.start():m.end() + 20].lower():
-            val *= 1000
-        liquidity += val
-        label_parts.append(f'${val:,.0f}M cash on hand')
-
-    # ATM remaining
-    m = re.search(
-        r'\$([\d,.]+)\s*(?:million|billion)\s+remaining.*?(?:ATM|at.the.market)',
-        content, re.IGNORECASE
-    )
-    if m:
-        val = float(m.group(1).replace(',', ''))
-        if 'billion' in content[m.start():m.end() + 20].lower():
+    # First match of each tail wins; stop once every gated tail is found
+    wanted = {name for name, keyword in (('on_hand', 'hand'), ('atm', 'remaining'))
+              if keyword in content_lower}
+    found = {}
+    if wanted:
+        for m in LIQUIDITY.finditer(content_lower):
+            found.setdefault(m.lastgroup, m)
+            if wanted.issubset(found):
+                break
+
+    for name, label in (('on_hand', 'cash on hand'), ('atm', 'ATM')):
+        m = found.get(name)
+        if not m:
+            continue
+        val = float(m.group(1).translate(STRIP_COMMAS))
+        if m.group(2) == 'billion':
             val *= 1000
         liquidity += val
-        label_parts.append(f'${val:,.0f}M ATM')
+        label_parts.append(f'${val:,.0f}M {label}')
 
     if liquidity > 0:
         data['available_liquidity'] = int(liquidity * 1000)  # convert M to K
         data['label'] = ' + '.join(label_parts)
         print(f"  Available liquidity: ${liquidity:,.1f}M ({data['label']})")
 
-    # 5. Quarterly burn: "Cash used in operating activities (X)"
-    m = re.search(
-        r'Cash used in operating activities\s*\(?\s*([\d,]+)',
-        content
-    )
-    if m:
-        data['quarterly_burn'] = int(m.group(1).replace(',', ''))
-        print(f"  Quarterly burn: ${data['quarterly_burn']:,}K")
-
-    # 6. Also check for pro forma liquidity mentions in MD&A
-    m = re.search(
-        r'(?:pro\s*forma|including).*?(?:cash|liquidity).*?\$([\d,.]+)\s*(billion|million)',
-        content, re.IGNORECASE
-    )
+    # 5. Also check for pro forma liquidity mentions in MD&A
+    has_anchor = 'forma' in content_lower or 'including' in content_lower
+    m = PRO_FORMA.search(content_lower) if has_anchor else None
     if m:
-        val = float(m.group(1).replace(',', ''))
-        unit = m.group(2).lower()
+        val = float(m.group(1).translate(STRIP_COMMAS))
+        unit = m.group(2)
         if unit == 'billion':
             val_k = int(val * 1_000_000)
         else:
@@ -18,11 +18,13 @@ import argparse
 import json
 import os
 import sys
-import time
 import urllib.request
 import urllib.error
 from datetime import datetime, date
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+
+import http_pool
+import response_cache
 
 # ============================================================================
 # Configuration
@@ -48,30 +50,16 @@ def log(msg: str):
 # ============================================================================
 
 def fetch_json(url: str, retries: int = 3) -> Optional[Dict]:
-    """Fetch JSON with retry logic."""
-    headers = {"Accept": "application/json"}
-    last_error = None
-
-    for attempt in range(retries):
-        try:
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req, timeout=30) as response:
-                return json.loads(response.read().decode("utf-8"))
-        except urllib.error.HTTPError as e:
-            last_error = e
-            if e.code == 429:
-                wait = 10 * (attempt + 1)
-                log(f"  Rate limited (429). Waiting {wait}s...")
-                time.sleep(wait)
-            elif attempt < retries - 1:
-                time.sleep(2 ** attempt)
-        except urllib.error.URLError as e:
-            last_error = e
-            if attempt < retries - 1:
-                time.sleep(2 ** attempt)
-
-    log(f"  Fetch failed after {retries} attempts: {last_error}")
-    return None
+    """Fetch JSON, retrying transient errors (429s back off longer)."""
+    try:
+        _, _, content = http_pool.request_with_retry(
+            "GET", url, {"Accept": "application/json"}, timeout=30,
+            retries=retries, rate_limit_backoff=10, log=log,
+        )
+        return json.loads(content)
+    except Exception as e:
+        log(f"  Fetch failed after {retries} attempts: {e}")
+        return None
 
 
 def supabase_request(method: str, endpoint: str, data: Optional[Dict] = None) -> Optional[list]:
@@ -114,9 +102,14 @@ def fetch_earnings_calendar() -> List[Dict]:
     url = f"{FINNHUB_BASE}/calendar/earnings?symbol={SYMBOL}&from={from_date}&to={to_date}&token={FINNHUB_API_KEY}"
     log(f"Fetching Finnhub earnings calendar ({from_date} to {to_date})...")
 
-    data = fetch_json(url)
-    if not data:
-        return []
+    cached = response_cache.get(url)
+    if cached is not None:
+        data = json.loads(cached)
+    else:
+        data = fetch_json(url)
+        if not data:
+            return []
+        response_cache.put(url, json.dumps(data, separators=(",", ":")).encode())
 
     entries = data.get("earningsCalendar", [])
     log(f"  Received {len(entries)} earnings entries")
@@ -127,19 +120,33 @@ def fetch_earnings_calendar() -> List[Dict]:
 # Main Logic
 # ============================================================================
 
-def get_existing_earnings() -> Dict[str, Dict]:
-    """Get existing earnings_transcripts keyed by 'YYYY-Q#'."""
+def get_existing_earnings(years: List[int]) -> Tuple[Set[str], Dict[str, Optional[str]]]:
+    """Get existing earnings_transcripts for the given fiscal years, keyed by 'YYYY-Q#'.
+
+    Filtering on fiscal_year keeps the payload to the calendar's window
+    instead of the company's whole transcript history.
+
+    Returns:
+        (completed_keys, existing_dates) — keys of complete (immutable) rows,
+        and call_date for every other existing row
+    """
+    year_list = ",".join(str(y) for y in sorted(set(years)))
     result = supabase_request(
         "GET",
-        f"earnings_transcripts?company=eq.{COMPANY}&select=id,fiscal_year,fiscal_quarter,call_date,status"
+        f"earnings_transcripts?company=eq.{COMPANY}&fiscal_year=in.({year_list})"
+        f"&select=fiscal_year,fiscal_quarter,call_date,status"
     )
 
-    existing = {}
+    completed_keys = set()
+    existing_dates = {}
     for row in (result or []):
         key = f"{row['fiscal_year']}-Q{row['fiscal_quarter']}"
-        existing[key] = row
+        if row.get("status") == "complete":
+            completed_keys.add(key)
+        else:
+            existing_dates[key] = row.get("call_date")
 
-    return existing
+    return completed_keys, existing_dates
 
 
 def run_worker(dry_run: bool = False):
@@ -163,8 +170,12 @@ def run_worker(dry_run: bool = False):
         return
 
     # Get existing DB records
-    existing = get_existing_earnings() if not dry_run else {}
-    log(f"Existing earnings in DB: {len(existing)}")
+    years = [e["year"] for e in calendar if e.get("year")]
+    if not dry_run and years:
+        completed_keys, existing_dates = get_existing_earnings(years)
+    else:
+        completed_keys, existing_dates = set(), {}
+    log(f"Existing earnings in DB: {len(completed_keys) + len(existing_dates)}")
 
     today_str = date.today().isoformat()
     created = 0
@@ -198,16 +209,14 @@ def run_worker(dry_run: bool = False):
             log(f"  [{flag}] {key}: {call_date} ({hour or 'unknown time'})")
             continue
 
-        db_row = existing.get(key)
-
-        if db_row:
-            # Existing record — respect immutable history rule
-            if db_row.get("status") == "complete":
-                skipped += 1
-                continue
+        # Existing record — respect immutable history rule
+        if key in completed_keys:
+            skipped += 1
+            continue
 
+        if key in existing_dates:
             # Check if date differs
-            db_date = db_row.get("call_date")
+            db_date = existing_dates[key]
             if db_date and db_date != call_date:
                 log(f"  {key}: DB has {db_date}, Finnhub has {call_date} — updating")
 
@@ -256,5 +265,7 @@ def run_worker(dry_run: bool = False):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Earnings Date Discovery Worker")
     parser.add_argument("--dry-run", action="store_true", help="Don't write to database")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk Finnhub response cache")
     args = parser.parse_args()
+    response_cache.enabled = not args.no_cache
     run_worker(dry_run=args.dry_run)
@@ -30,16 +30,22 @@ Usage:
 from __future__ import annotations
 import argparse
 import base64
+import functools
+import hashlib
 import json
+import multiprocessing
+import operator
 import os
 import sys
+import threading
 import time
-import urllib.request
 import urllib.error
 import urllib.parse
 import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Set
+from html import unescape
 from html.parser import HTMLParser
 
 # Import storage utilities
@@ -51,6 +57,8 @@ from storage_utils import (
     log,
 )
 from pdf_extractor import extract_pdf_text
+import http_pool
+import response_cache
 
 
 # ============================================================================
@@ -109,74 +117,127 @@ HIGH_IMPORTANCE_FILERS = [
 
 # Rate limits
 RATE_LIMIT_SECONDS = 0.5
-RATE_LIMIT_RETRY_SECONDS = 10  # Wait time on 429 error
+DOCKET_WORKERS = 4  # Dockets crawled concurrently in discover_all_filings
+DOCKET_PAGE_WORKERS = 4  # Concurrent offset requests in fetch_all_docket_filings
+FILING_WORKERS = 4  # Filings processed concurrently (PDF download/extract/upload)
+ATTACHMENT_WORKERS = 4  # Concurrent PDF downloads per filing
+RATE_LIMIT_RETRY_SECONDS = 10  # Base backoff on 429 without Retry-After
 CONTENT_EXTRACT_DELAY = 3.0  # Delay between Playwright PDF downloads
 
+UPSERT_BATCH_SIZE = 100  # fcc_filings rows per bulk upsert
+PDF_MIN_BYTES = 1000  # Smaller attachments are empty/placeholder PDFs
+CONTENT_TEXT_MAX_BYTES = 500_000  # fcc_filings.content_text cap, UTF-8 bytes
+
+# docs.fcc.gov attachment URLs are immutable, so downloaded PDFs are kept
+# on disk for backfills/retries (None disables; see --pdf-cache-dir/--no-cache)
+PDF_CACHE_DIR: Optional[str] = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "ecfs_pdfs"
+)
+
+# Every ECFS API request (docket pages, filer search, proceeding metadata)
+# takes a token in fetch_json, so concurrent callers share one budget and
+# the API still sees at most one request per RATE_LIMIT_SECONDS
+FCC_API_BUCKET = http_pool.TokenBucket(1 / RATE_LIMIT_SECONDS)
+# Same for attachment downloads from docs.fcc.gov across filing workers:
+# fetch_bytes takes a token per request (HEAD and each byte range), not per file
+FCC_DOCS_BUCKET = http_pool.TokenBucket(1 / RATE_LIMIT_SECONDS)
+
 
 # ============================================================================
 # HTTP Utilities
 # ============================================================================
 
-def fetch_url(url: str, headers: Optional[Dict] = None, retries: int = 3) -> str:
-    """Fetch URL content with retry logic and 429 handling."""
+def fetch_raw(url: str, headers: Optional[Dict] = None, retries: int = 3) -> bytes:
+    """Fetch URL body bytes, retrying transient errors (429s back off longer)."""
     default_headers = {
         "User-Agent": "Short Gravity Research gabriel@shortgravity.com"
     }
     if headers:
         default_headers.update(headers)
 
-    last_error = None
-    for attempt in range(retries):
-        try:
-            req = urllib.request.Request(url, headers=default_headers)
-            with urllib.request.urlopen(req, timeout=60) as response:
-                return response.read().decode("utf-8", errors="replace")
-        except urllib.error.HTTPError as e:
-            last_error = e
-            if e.code == 429:
-                # Rate limited - wait longer
-                wait_time = RATE_LIMIT_RETRY_SECONDS * (attempt + 1)
-                log(f"  Rate limited (429). Waiting {wait_time}s before retry...")
-                time.sleep(wait_time)
-            elif attempt < retries - 1:
-                time.sleep(2 ** attempt)
-        except urllib.error.URLError as e:
-            last_error = e
-            if attempt < retries - 1:
-                time.sleep(2 ** attempt)
-
-    raise last_error
+    return http_pool.request_with_retry(
+        "GET", url, default_headers, timeout=60, retries=retries,
+        rate_limit_backoff=RATE_LIMIT_RETRY_SECONDS, log=log,
+    )[2]
+
+
+def fetch_url(url: str, headers: Optional[Dict] = None, retries: int = 3) -> str:
+    """Fetch URL content as text."""
+    return fetch_raw(url, headers, retries).decode("utf-8", errors="replace")
+
+
+def fcc_api_url(base: str, params: Dict) -> str:
+    """ECFS API URL with percent-encoded query params.
+
+    The API key is not part of it: fetch_json sends it as X-Api-Key (the
+    api.data.gov gateway accepts either), so it stays out of URLs, logs and
+    cache keys.
+    """
+    return f"{base}?{urllib.parse.urlencode(params, quote_via=urllib.parse.quote)}"
 
 
 def fetch_json(url: str) -> Dict:
-    """Fetch JSON from URL."""
-    content = fetch_url(url, {"Accept": "application/json"})
+    """Fetch JSON from URL (via the on-disk response cache), parsing the body bytes without a decoded copy.
+
+    Only used for the FCC ECFS API, so a cache miss takes an FCC_API_BUCKET
+    token; cache hits don't spend the rate budget.
+    """
+    content = response_cache.get(url)
+    if content is None:
+        FCC_API_BUCKET.acquire()
+        content = fetch_raw(url, {"Accept": "application/json", "X-Api-Key": FCC_API_KEY})
+        response_cache.put(url, content)
     return json.loads(content)
 
 
+def fetch_pdf_cached(url: str) -> bytes:
+    """Fetch an attachment via the on-disk PDF cache (keyed by URL hash)."""
+    if not PDF_CACHE_DIR:
+        return fetch_bytes(url)
+
+    key = hashlib.sha256(url.encode()).hexdigest()
+    path = os.path.join(PDF_CACHE_DIR, key[:2], f"{key}.pdf")
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    data = fetch_bytes(url)
+    if not data:
+        return data
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)  # Atomic: readers never see a partial file
+    except OSError as e:
+        log(f"    PDF cache write failed: {e}")
+    return data
+
+
 def fetch_bytes(url: str, retries: int = 3) -> bytes:
     """Fetch binary content."""
     headers = {"User-Agent": "Short Gravity Research gabriel@shortgravity.com"}
-
-    last_error = None
-    for attempt in range(retries):
-        try:
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req, timeout=120) as response:
-                return response.read()
-        except (urllib.error.URLError, urllib.error.HTTPError) as e:
-            last_error = e
-            if attempt < retries - 1:
-                time.sleep(2 ** attempt)
-
-    raise last_error
+    # Large attachments (some run 50-100 MB) come down as parallel ranges;
+    # ones the HEAD shows are under PDF_MIN_BYTES aren't downloaded at all
+    return http_pool.fetch_ranged(
+        url, headers, timeout=120, retries=retries, log=log, min_size=PDF_MIN_BYTES,
+        pace=FCC_DOCS_BUCKET.acquire,
+    )
 
 
 # ============================================================================
 # Supabase Operations
 # ============================================================================
 
-def supabase_request(method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
+def supabase_request(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict | List[Dict]] = None,
+    prefer: str = "return=representation",
+) -> Dict:
     """Make Supabase REST API request."""
     if not SUPABASE_SERVICE_KEY:
         raise ValueError("SUPABASE_SERVICE_KEY not set")
@@ -186,16 +247,15 @@ def supabase_request(method: str, endpoint: str, data: Optional[Dict] = None) ->
         "apikey": SUPABASE_SERVICE_KEY,
         "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
         "Content-Type": "application/json",
-        "Prefer": "return=representation",
+        "Prefer": prefer,
     }
 
-    body = json.dumps(data).encode() if data else None
-    req = urllib.request.Request(url, data=body, headers=headers, method=method)
+    # Compact separators: smaller bulk-upsert bodies, same C encoder
+    body = json.dumps(data, separators=(",", ":")).encode() if data else None
 
     try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            content = response.read().decode("utf-8")
-            return json.loads(content) if content else {}
+        _, _, content = http_pool.request(method, url, headers, body, timeout=30)
+        return json.loads(content) if content else {}
     except urllib.error.HTTPError as e:
         error_body = e.read().decode("utf-8")
         log(f"Supabase error: {e.code} - {error_body}")
@@ -203,35 +263,39 @@ def supabase_request(method: str, endpoint: str, data: Optional[Dict] = None) ->
 
 
 def get_existing_ecfs_filings() -> Set[str]:
-    """Get existing ECFS filing IDs from database."""
+    """
+    Get existing ECFS filing IDs from database.
+
+    Paged because PostgREST caps a single response at 1000 rows.
+    """
+    existing: Set[str] = set()
+    page_size = 1000
+    offset = 0
     try:
-        # Check fcc_filings table for ECFS entries
-        result = supabase_request("GET", "fcc_filings?filing_system=eq.ECFS&select=file_number")
-        return {r["file_number"] for r in result if r.get("file_number")}
+        while True:
+            result = supabase_request(
+                "GET",
+                f"fcc_filings?filing_system=eq.ECFS&select=file_number"
+                f"&order=id&limit={page_size}&offset={offset}"
+            )
+            existing.update(r["file_number"] for r in result if r.get("file_number"))
+            if len(result) < page_size:
+                return existing
+            offset += page_size
     except Exception as e:
         log(f"Error fetching existing ECFS filings: {e}")
-        return set()
-
-
-def upsert_fcc_filing(filing: Dict) -> Dict:
-    """Insert or update FCC filing."""
-    file_number = filing.get("file_number")
-    filing_system = filing.get("filing_system", "ECFS")
+        return existing
 
-    # Check if exists
-    existing = supabase_request(
-        "GET",
-        f"fcc_filings?file_number=eq.{file_number}&filing_system=eq.{filing_system}&select=id"
-    )
 
-    if existing:
-        return supabase_request(
-            "PATCH",
-            f"fcc_filings?file_number=eq.{file_number}&filing_system=eq.{filing_system}",
-            filing
+def upsert_fcc_filings(filings: List[Dict]) -> None:
+    """Bulk upsert FCC filings on (filing_system, file_number). Raises on HTTP error."""
+    for i in range(0, len(filings), UPSERT_BATCH_SIZE):
+        supabase_request(
+            "POST",
+            "fcc_filings?on_conflict=filing_system,file_number",
+            filings[i:i + UPSERT_BATCH_SIZE],
+            prefer="resolution=merge-duplicates,return=minimal",
         )
-    else:
-        return supabase_request("POST", "fcc_filings", filing)
 
 
 # ============================================================================
@@ -243,7 +307,7 @@ FCC_PROCEEDINGS_BASE = "https://publicapi.fcc.gov/ecfs/proceedings"
 
 def fetch_proceeding_metadata(docket: str) -> Optional[Dict]:
     """Fetch docket/proceeding metadata from FCC ECFS API."""
-    url = f"{FCC_PROCEEDINGS_BASE}?api_key={FCC_API_KEY}&name={docket}"
+    url = fcc_api_url(FCC_PROCEEDINGS_BASE, {"name": docket})
     try:
         data = fetch_json(url)
         proceedings = data.get("proceeding", [])
@@ -273,7 +337,6 @@ def sync_docket_metadata(dry_run: bool = False):
         proc = fetch_proceeding_metadata(docket)
         if not proc:
             log(f"    No proceeding data found for {docket}")
-            time.sleep(RATE_LIMIT_SECONDS)
             continue
 
         # Build upsert record from API data
@@ -334,8 +397,6 @@ def sync_docket_metadata(dry_run: bool = False):
             except Exception as e:
                 log(f"    ✗ Failed to sync {docket}: {e}")
 
-        time.sleep(RATE_LIMIT_SECONDS)
-
     log(f"Docket metadata sync complete: {synced}/{len(KEY_DOCKETS)} synced")
     log("-" * 60)
 
@@ -346,7 +407,12 @@ def sync_docket_metadata(dry_run: bool = False):
 
 def fetch_docket_filings(docket: str, limit: int = 500, offset: int = 0) -> List[Dict]:
     """Fetch filings for a specific docket using FCC Public API."""
-    url = f"{FCC_API_BASE}?api_key={FCC_API_KEY}&proceedings.name={docket}&limit={limit}&offset={offset}&sort=date_received,DESC"
+    url = fcc_api_url(FCC_API_BASE, {
+        "proceedings.name": docket,
+        "limit": limit,
+        "offset": offset,
+        "sort": "date_received,DESC",
+    })
 
     try:
         data = fetch_json(url)
@@ -356,35 +422,52 @@ def fetch_docket_filings(docket: str, limit: int = 500, offset: int = 0) -> List
         return []
 
 
-def fetch_all_docket_filings(docket: str) -> List[Dict]:
-    """Fetch ALL filings for a docket, paginating through results."""
-    all_filings = []
-    offset = 0
-    limit = 500
+def fetch_all_docket_filings(docket: str) -> Iterator[Dict]:
+    """Yield ALL filings for a docket, paginating through results.
 
-    while True:
-        log(f"    Fetching offset {offset}...")
-        filings = fetch_docket_filings(docket, limit=limit, offset=offset)
+    Filings are yielded page by page as they arrive, so callers can drop the
+    ones they don't need instead of holding the whole docket. The API returns
+    no total count, so after a full first page the next DOCKET_PAGE_WORKERS
+    offsets are requested concurrently, wave by wave, until a short or empty
+    page marks the end.
+    """
+    limit = 500
 
-        if not filings:
-            break
+    log(f"    [{docket}] Fetching offset 0...")
+    filings = fetch_docket_filings(docket, limit=limit, offset=0)
+    log(f"    [{docket}] Got {len(filings)} filings (total: {len(filings)})")
+    yield from filings
+    if len(filings) < limit:
+        return
+    total = len(filings)
 
-        all_filings.extend(filings)
-        log(f"    Got {len(filings)} filings (total: {len(all_filings)})")
+    def fetch_page(offset: int) -> List[Dict]:
+        return fetch_docket_filings(docket, limit=limit, offset=offset)
 
-        if len(filings) < limit:
-            break
+    offset = limit
+    with ThreadPoolExecutor(max_workers=DOCKET_PAGE_WORKERS) as pool:
+        while True:
+            offsets = range(offset, offset + limit * DOCKET_PAGE_WORKERS, limit)
+            log(f"    [{docket}] Fetching offsets {offsets[0]}-{offsets[-1]}...")
 
-        offset += limit
-        time.sleep(RATE_LIMIT_SECONDS)
+            for filings in pool.map(fetch_page, offsets):
+                total += len(filings)
+                yield from filings
+                if len(filings) < limit:
+                    log(f"    [{docket}] Got {total} filings total")
+                    return
 
-    return all_filings
+            log(f"    [{docket}] Got {total} filings so far")
+            offset += limit * DOCKET_PAGE_WORKERS
 
 
 def fetch_filer_filings(filer_name: str, limit: int = 100) -> List[Dict]:
     """Search for filings by filer name."""
-    encoded = urllib.parse.quote(filer_name)
-    url = f"{FCC_API_BASE}?api_key={FCC_API_KEY}&filers.name={encoded}&limit={limit}&sort=date_received,DESC"
+    url = fcc_api_url(FCC_API_BASE, {
+        "filers.name": filer_name,
+        "limit": limit,
+        "sort": "date_received,DESC",
+    })
 
     try:
         data = fetch_json(url)
@@ -415,21 +498,42 @@ def fetch_filing_document(filing_id: str) -> Optional[str]:
     return None
 
 
+# HTML-to-text patterns, compiled once (applied to every fetched filing page)
+# Script and style blocks in one pass; the backreference closes each block
+# with its own end tag
+_RE_SCRIPT_STYLE = re.compile(r"<(script|style)[^>]*>[\s\S]*?</\1>", re.IGNORECASE)
+_RE_TAG = re.compile(r"<[^>]+>")
+_RE_WS = re.compile(r"\s+")
+
+
 def extract_text_from_html(html: str) -> str:
     """Extract text from HTML content."""
-    text = re.sub(r"<script[^>]*>[\s\S]*?</script>", "", html, flags=re.IGNORECASE)
-    text = re.sub(r"<style[^>]*>[\s\S]*?</style>", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"<[^>]+>", " ", text)
-    text = text.replace("&nbsp;", " ")
-    text = text.replace("&amp;", "&")
-    text = text.replace("&lt;", "<")
-    text = text.replace("&gt;", ">")
-    text = text.replace("&quot;", '"')
-    text = re.sub(r"&#\d+;", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _RE_SCRIPT_STYLE.sub("", html)
+    text = _RE_TAG.sub(" ", text)
+    # All named (HTML5) and numeric/hex references in one pass; &nbsp;
+    # becomes U+00A0, which the whitespace collapse below turns into " "
+    text = unescape(text)
+    text = _RE_WS.sub(" ", text).strip()
     return text
 
 
+_extract_executor: Optional[ProcessPoolExecutor] = None
+_extract_lock = threading.Lock()
+
+
+def _extract_pool() -> ProcessPoolExecutor:
+    """Process pool for PDF text extraction, created once and shared by all filings."""
+    global _extract_executor
+    with _extract_lock:
+        if _extract_executor is None:
+            # spawn, not fork: the parent is multi-threaded by the time this runs
+            _extract_executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _extract_executor
+
+
 def process_ecfs_pdf_attachments(
     filing_id: str,
     documents: List[Dict],
@@ -451,6 +555,7 @@ def process_ecfs_pdf_attachments(
     """
     content_parts = []
     storage_paths = []
+    direct = []  # (index, src) of attachments to fetch this phase
 
     for i, doc in enumerate(documents):  # Process ALL documents, no limit
         src = doc.get("src") or doc.get("url") or ""
@@ -459,9 +564,8 @@ def process_ecfs_pdf_attachments(
 
         # Phase 1: Only process direct download URLs (fast)
         # Skip fcc.gov/ecfs/document/ URLs - they timeout, Playwright handles them in Phase 2
-        is_direct_pdf = (
-            'docs.fcc.gov' in src and src.lower().endswith('.pdf')
-        )
+        # Lowercase only the 4-char suffix, not the whole URL
+        is_direct_pdf = src[-4:].lower() == '.pdf' and 'docs.fcc.gov' in src
 
         if not is_direct_pdf:
             # Log that we're skipping for Phase 2
@@ -475,43 +579,66 @@ def process_ecfs_pdf_attachments(
             log(f"    [DRY RUN] Would fetch and process PDF")
             continue
 
-        try:
-            pdf_bytes = fetch_bytes(src)
+        direct.append((i, src))
 
-            if not pdf_bytes or len(pdf_bytes) < 1000:
-                log(f"    PDF too small or empty, skipping")
-                continue
+    if not direct:
+        return "", storage_paths
 
-            log(f"    Downloaded {len(pdf_bytes):,} bytes")
+    def download(item: tuple) -> tuple:
+        # Runs on an I/O thread; the PDF goes to the extraction pool as soon
+        # as it lands, so parsing overlaps the remaining downloads
+        i, src = item
+        try:
+            pdf_bytes = fetch_pdf_cached(src)
+        except Exception as e:
+            log(f"    Error downloading PDF: {e}")
+            return None, None
+        if not pdf_bytes or len(pdf_bytes) < PDF_MIN_BYTES:
+            log(f"    PDF {i+1} too small or empty, skipping")
+            return None, None
+        log(f"    Downloaded {len(pdf_bytes):,} bytes (PDF {i+1})")
+        return pdf_bytes, _extract_pool().submit(extract_pdf_text, pdf_bytes)
+
+    def upload(i: int, pdf_bytes: bytes) -> Optional[str]:
+        try:
+            storage_result = upload_fcc_attachment(
+                file_number=filing_id,
+                attachment_number=i + 1,
+                content=pdf_bytes,
+                filename=f"doc_{i+1}.pdf",
+                content_type="application/pdf",
+            )
+        except Exception as e:
+            log(f"    Error uploading PDF {i+1}: {e}")
+            return None
+        if storage_result.get("success"):
+            log(f"    Uploaded to storage: {storage_result.get('path')}")
+            return storage_result.get("path")
+        return None
 
-            # Extract text from PDF
-            text = extract_pdf_text(pdf_bytes)
+    # Pipeline: downloads and Storage uploads overlap on threads (downloads
+    # still paced by FCC_DOCS_BUCKET); text extraction is CPU-bound, so it
+    # fans out to processes. Results are consumed in attachment order.
+    with ThreadPoolExecutor(max_workers=ATTACHMENT_WORKERS) as io_pool:
+        uploads = []
+        for (i, _), (pdf_bytes, extraction) in zip(direct, io_pool.map(download, direct)):
+            if extraction is None:
+                continue
+            try:
+                text = extraction.result()
+            except Exception as e:
+                log(f"    Error processing PDF {i+1}: {e}")
+                continue
 
             if text and len(text) > 100:
                 content_parts.append(f"--- PDF Document {i+1} ---\n{text}")
-                log(f"    Extracted {len(text):,} chars from PDF")
-
-                # Upload PDF to storage
-                filename = f"doc_{i+1}.pdf"
-                storage_result = upload_fcc_attachment(
-                    file_number=filing_id,
-                    attachment_number=i + 1,
-                    content=pdf_bytes,
-                    filename=filename,
-                    content_type="application/pdf",
-                )
-
-                if storage_result.get("success"):
-                    storage_paths.append(storage_result.get("path"))
-                    log(f"    Uploaded to storage: {storage_result.get('path')}")
+                log(f"    Extracted {len(text):,} chars from PDF {i+1}")
+                uploads.append(io_pool.submit(upload, i, pdf_bytes))
             else:
-                log(f"    No text extracted from PDF (may be scanned/image)")
-
-            time.sleep(RATE_LIMIT_SECONDS)
+                log(f"    No text extracted from PDF {i+1} (may be scanned/image)")
 
-        except Exception as e:
-            log(f"    Error processing PDF: {e}")
-            continue
+        # Collected in attachment order, so storage_paths matches content_parts
+        storage_paths.extend(path for path in (u.result() for u in uploads) if path)
 
     return "\n\n".join(content_parts), storage_paths
 
@@ -562,12 +689,9 @@ Summary:"""
         "messages": [{"role": "user", "content": prompt}],
     }
 
-    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers=headers)
-
     try:
-        with urllib.request.urlopen(req, timeout=60) as response:
-            result = json.loads(response.read().decode("utf-8"))
-            return result["content"][0]["text"].strip()
+        _, _, content = http_pool.request("POST", url, headers, json.dumps(body).encode(), timeout=60)
+        return json.loads(content)["content"][0]["text"].strip()
     except Exception as e:
         log(f"Summary generation error: {e}")
         return ""
@@ -577,60 +701,143 @@ Summary:"""
 # Filing Discovery & Processing
 # ============================================================================
 
-def discover_all_filings(specific_docket: Optional[str] = None) -> List[Dict]:
-    """Discover all relevant ECFS filings."""
-    all_filings = {}
+# ECFS API filing fields used by process_filing(); discovery drops the rest
+FILING_FIELDS = (
+    "id_submission", "id_long", "id", "submissiontype", "filers",
+    "date_received", "proceedings", "documents", "bureaus",
+)
 
-    dockets_to_fetch = KEY_DOCKETS
-    if specific_docket:
-        dockets_to_fetch = [d for d in KEY_DOCKETS if d["docket"] == specific_docket]
-        if not dockets_to_fetch:
-            dockets_to_fetch = [{"docket": specific_docket, "name": "Custom", "importance": "normal"}]
 
-    log("Discovering ECFS filings...")
+def truncate_utf8(text: str, max_bytes: int) -> str:
+    """Cap text at max_bytes of UTF-8 without splitting a character."""
+    # Any UTF-8 char is at most 4 bytes, so short text can't be over the cap
+    if len(text) * 4 <= max_bytes:
+        return text
+    data = text.encode("utf-8")
+    if len(data) <= max_bytes:
+        return text
+    return data[:max_bytes].decode("utf-8", errors="ignore")
 
-    # Fetch from all dockets
-    for docket_info in dockets_to_fetch:
-        docket = docket_info["docket"]
-        name = docket_info["name"]
-        importance = docket_info["importance"]
 
-        log(f"  Fetching docket {docket} ({name})...")
-        filings = fetch_all_docket_filings(docket)
+def filing_id_of(filing: Dict) -> str:
+    """ECFS filing ID: id_submission, else id_long, else id ("" if none)."""
+    return str(filing.get("id_submission") or filing.get("id_long") or filing.get("id") or "")
 
-        for f in filings:
-            filing_id = str(f.get("id_submission") or f.get("id_long") or f.get("id"))
-            if filing_id and filing_id not in all_filings:
+
+def discover_all_filings(
+    specific_docket: Optional[str] = None,
+    skip_ids: Set[str] = frozenset(),
+) -> List[Dict]:
+    """
+    Discover all relevant ECFS filings.
+
+    Filings whose ID is in skip_ids are counted but not kept, so an
+    incremental run only holds the new filings in memory.
+    """
+    all_filings = {}
+    seen: Set[str] = set()
+
+    def keep(f: Dict) -> Dict:
+        # Only what process_filing() reads; API filings carry dozens of
+        # other fields (addresses, contacts, text_data, ...)
+        f = {k: f[k] for k in FILING_FIELDS if k in f}
+        # Always a string, so run_worker can sort on it directly
+        f["date_received"] = f.get("date_received") or ""
+        return f
+
+    def add(filing_id: str, f: Optional[Dict], docket: str, name: str, importance: str) -> None:
+        # First docket to report a filing claims it; f is None for filings
+        # in skip_ids, which only count toward the unique total
+        if filing_id and filing_id not in seen:
+            seen.add(filing_id)
+            if f is not None:
+                f["_filing_id"] = filing_id
                 f["_docket"] = docket
                 f["_docket_name"] = name
                 f["_docket_importance"] = importance
                 all_filings[filing_id] = f
 
-        time.sleep(RATE_LIMIT_SECONDS)
+    def collect(docket_info: Dict) -> List[tuple]:
+        # Runs on a pool thread. Filings are trimmed as their pages arrive
+        # (the ID is computed once here), so a docket's full API payload is
+        # never held at once
+        docket = docket_info["docket"]
+        log(f"  Fetching docket {docket} ({docket_info['name']})...")
+        found = []
+        for f in fetch_all_docket_filings(docket):
+            filing_id = filing_id_of(f)
+            if filing_id:
+                found.append((filing_id, None if filing_id in skip_ids else keep(f)))
+        return found
 
-    log(f"Total unique filings discovered: {len(all_filings)}")
+    dockets_to_fetch = KEY_DOCKETS
+    if specific_docket:
+        dockets_to_fetch = [d for d in KEY_DOCKETS if d["docket"] == specific_docket]
+        if not dockets_to_fetch:
+            dockets_to_fetch = [{"docket": specific_docket, "name": "Custom", "importance": "normal"}]
 
-    # Also search for AST SpaceMobile filings directly
-    log("  Searching for AST SpaceMobile filings...")
-    for filer in ["AST SpaceMobile", "AST & Science"]:
-        filings = fetch_filer_filings(filer)
-        for f in filings:
-            filing_id = str(f.get("id_submission") or f.get("id_long") or f.get("id"))
-            if filing_id and filing_id not in all_filings:
-                f["_docket"] = "direct_search"
-                f["_docket_name"] = "Direct Filer Search"
-                f["_docket_importance"] = "high"
-                all_filings[filing_id] = f
-        time.sleep(RATE_LIMIT_SECONDS)
+    log("Discovering ECFS filings...")
 
-    log(f"Total with filer search: {len(all_filings)}")
+    # Dockets and the direct filer searches are fetched concurrently
+    # (FCC_API_BUCKET still paces every request); results are claimed
+    # dockets first, in KEY_DOCKETS order, so a filing in several dockets
+    # is attributed exactly as in a serial crawl
+    with ThreadPoolExecutor(max_workers=DOCKET_WORKERS) as pool:
+        filer_searches = [
+            pool.submit(fetch_filer_filings, filer)
+            for filer in ("AST SpaceMobile", "AST & Science")
+        ]
+        for docket_info, found in zip(dockets_to_fetch, pool.map(collect, dockets_to_fetch)):
+            for filing_id, f in found:
+                add(filing_id, f, docket_info["docket"], docket_info["name"], docket_info["importance"])
+
+        log(f"Total unique filings discovered: {len(seen)}")
+
+        # Also search for AST SpaceMobile filings directly
+        log("  Searching for AST SpaceMobile filings...")
+        for search in filer_searches:
+            for f in search.result():
+                filing_id = filing_id_of(f)
+                add(filing_id, None if filing_id in skip_ids else keep(f),
+                    "direct_search", "Direct Filer Search", "high")
+
+    log(f"Total with filer search: {len(seen)}")
 
     return list(all_filings.values())
 
 
-def process_filing(filing: Dict, dry_run: bool = False, fetch_content: bool = True) -> bool:
-    """Process a single ECFS filing."""
-    filing_id = str(filing.get("id_submission") or filing.get("id_long") or filing.get("id"))
+@functools.lru_cache(maxsize=4096)
+def determine_importance(filer: str, docket_importance: str) -> str:
+    """
+    Importance of a filing from its primary filer and docket.
+
+    Cached: a dozen or so filers submit most filings, so each (filer,
+    docket importance) pair is scanned against HIGH_IMPORTANCE_FILERS once.
+    """
+    filer_lower = filer.lower()
+    if "ast spacemobile" in filer_lower or "ast & science" in filer_lower:
+        return "critical"
+    for high_filer in HIGH_IMPORTANCE_FILERS:
+        if high_filer in filer_lower:
+            return "high"
+    return docket_importance
+
+
+def process_filing(
+    filing: Dict,
+    pending: List[Dict],
+    dry_run: bool = False,
+    fetch_content: bool = True,
+) -> bool:
+    """
+    Process a single ECFS filing.
+
+    The finished fcc_filings row is appended to pending; the caller bulk
+    upserts it with upsert_fcc_filings().
+    """
+    # Bound once: this function reads a dozen filing fields per call
+    get = filing.get
+    filing_id = get("_filing_id") or filing_id_of(filing)
     if not filing_id:
         return False
 
@@ -642,66 +849,54 @@ def process_filing(filing: Dict, dry_run: bool = False, fetch_content: bool = Tr
 
     try:
         # Extract metadata
-        submission_type = filing.get("submissiontype", {})
+        submission_type = get("submissiontype", {})
         type_desc = submission_type.get("description", "Filing")
         type_short = submission_type.get("short", "")
 
-        filers = filing.get("filers", [])
+        filers = get("filers", [])
         filer = filers[0].get("name", "Unknown") if filers else "Unknown"
         all_filers = [f.get("name") for f in filers]
 
-        date_received = filing.get("date_received", "")
+        date_received = get("date_received", "")
         if date_received and "T" not in date_received:
             date_received = f"{date_received}T00:00:00Z"
 
-        proceedings = [p.get("name", "") for p in filing.get("proceedings", [])]
-        docket = filing.get("_docket") or (proceedings[0] if proceedings else "Unknown")
-        docket_name = filing.get("_docket_name", "")
+        proceedings = [p.get("name", "") for p in get("proceedings", [])]
+        docket = get("_docket") or (proceedings[0] if proceedings else "Unknown")
+        docket_name = get("_docket_name", "")
 
         # Build title
         title = f"{filer}: {type_desc}"
         if docket and docket != "direct_search":
             title += f" (Docket {docket})"
 
-        # Determine importance
-        importance = filing.get("_docket_importance", "normal")
-        filer_lower = filer.lower()
-        for high_filer in HIGH_IMPORTANCE_FILERS:
-            if high_filer in filer_lower:
-                importance = "high"
-                break
-        if "ast spacemobile" in filer_lower or "ast & science" in filer_lower:
-            importance = "critical"
-
-        # Get document URL
-        docs = filing.get("documents", [])
-        doc_url = docs[0].get("src", "") if docs else ""
+        importance = determine_importance(filer, get("_docket_importance", "normal"))
+
+        # Documents array: first entry gives the document URL, all of them
+        # go through attachment processing
+        documents = get("documents", [])
+        doc_url = documents[0].get("src", "") if documents else ""
         if not doc_url:
             doc_url = f"https://www.fcc.gov/ecfs/document/{filing_id}/1"
 
-        # Get documents array for attachment processing
-        documents = filing.get("documents", [])
-
         # Fetch document content
         content_text = None
         storage_path = None
         pdf_storage_paths = []
-        content_parts = []
 
         if fetch_content:
             # Process document attachments from the API response
             # The documents array contains direct URLs to PDFs/files - no need for HTML fetch
             if documents:
                 log(f"  Processing {len(documents)} document attachment(s)...")
+                # Attachment text is the only content source, so it is used
+                # as-is rather than joined through a one-element list
                 pdf_content, pdf_storage_paths = process_ecfs_pdf_attachments(
                     filing_id, documents, dry_run=False
                 )
-                if pdf_content:
-                    content_parts.append(pdf_content)
+                content_text = pdf_content or None
 
-            # Combine all content
-            if content_parts:
-                content_text = "\n\n".join(content_parts)
+            if content_text:
                 log(f"  Total content: {len(content_text):,} chars")
 
                 # Upload combined content to storage
@@ -720,6 +915,7 @@ def process_filing(filing: Dict, dry_run: bool = False, fetch_content: bool = Tr
         summary = None
 
         # Prepare database record
+        now = datetime.utcnow().isoformat() + "Z"
         db_record = {
             "filing_system": "ECFS",
             "file_number": filing_id,
@@ -729,19 +925,19 @@ def process_filing(filing: Dict, dry_run: bool = False, fetch_content: bool = Tr
             "title": title,
             "filer_name": filer,
             "filed_date": date_received[:10] if date_received else None,
-            "content_text": content_text[:500000] if content_text else None,  # Limit for DB
+            "content_text": truncate_utf8(content_text, CONTENT_TEXT_MAX_BYTES) if content_text else None,
             "storage_path": storage_path,
             "source_url": doc_url,
             "metadata": json.dumps({
                 "all_filers": all_filers,
                 "proceedings": proceedings,
                 "submission_type_short": type_short,
-                "bureaus": [b.get("name") for b in filing.get("bureaus", [])],
+                "bureaus": [b.get("name") for b in get("bureaus", [])],
                 "importance": importance,
                 "pdf_attachments": pdf_storage_paths,
                 "document_count": len(documents) if fetch_content else 0,
-            }),
-            "fetched_at": datetime.utcnow().isoformat() + "Z",
+            }, separators=(",", ":")),
+            "fetched_at": now,
             "status": "completed",
         }
 
@@ -749,12 +945,11 @@ def process_filing(filing: Dict, dry_run: bool = False, fetch_content: bool = Tr
             db_record.update({
                 "ai_summary": summary,
                 "ai_model": "claude-haiku-4-5-20251001",
-                "ai_generated_at": datetime.utcnow().isoformat() + "Z",
+                "ai_generated_at": now,
             })
 
-        # Upsert to database
-        upsert_fcc_filing(db_record)
-        log(f"  ✓ Database updated")
+        pending.append(db_record)
+        log(f"  ✓ Queued for database")
 
         return True
 
@@ -868,6 +1063,47 @@ def backfill_content(args):
     success = 0
     failed = 0
 
+    def finish(filing: Dict, content_text: str, storage_path: Optional[str]) -> bool:
+        """Summarize (if configured) and PATCH one filing; runs off the browser thread."""
+        file_number = filing["file_number"]
+
+        # Generate AI summary
+        ai_summary = ""
+        if ANTHROPIC_API_KEY:
+            ai_summary = generate_ecfs_summary(filing, content_text)
+            if ai_summary:
+                log(f"    {file_number} summary: {ai_summary[:80]}...")
+
+        # PATCH the filing record
+        patch_data = {
+            "content_text": truncate_utf8(content_text, CONTENT_TEXT_MAX_BYTES),
+            "fetched_at": datetime.utcnow().isoformat() + "Z",
+        }
+        if storage_path:
+            patch_data["storage_path"] = storage_path
+        if ai_summary:
+            patch_data["ai_summary"] = ai_summary
+            patch_data["ai_model"] = "claude-haiku-4-5-20251001"
+            patch_data["ai_generated_at"] = datetime.utcnow().isoformat() + "Z"
+
+        try:
+            supabase_request(
+                "PATCH",
+                f"fcc_filings?file_number=eq.{file_number}&filing_system=eq.ECFS",
+                patch_data,
+            )
+            log(f"    ✓ Updated {file_number}")
+            return True
+        except Exception as e:
+            log(f"    ✗ PATCH failed for {file_number}: {e}")
+            return False
+
+    # The Claude summary and PATCH for one filing run on a background thread
+    # while the browser waits out CONTENT_EXTRACT_DELAY and fetches the next,
+    # so summary latency no longer adds to every filing
+    finisher = ThreadPoolExecutor(max_workers=1)
+    finishing = []
+
     try:
         for i, filing in enumerate(filings):
             file_number = filing["file_number"]
@@ -928,42 +1164,20 @@ def backfill_content(args):
                     storage_path = storage_result.get("path")
                     log(f"    Stored: {storage_path}")
 
-            # Generate AI summary
-            ai_summary = ""
-            if ANTHROPIC_API_KEY:
-                ai_summary = generate_ecfs_summary(filing, content_text)
-                if ai_summary:
-                    log(f"    Summary: {ai_summary[:80]}...")
-
-            # PATCH the filing record
-            patch_data = {
-                "content_text": content_text[:500000],
-                "fetched_at": datetime.utcnow().isoformat() + "Z",
-            }
-            if storage_path:
-                patch_data["storage_path"] = storage_path
-            if ai_summary:
-                patch_data["ai_summary"] = ai_summary
-                patch_data["ai_model"] = "claude-haiku-4-5-20251001"
-                patch_data["ai_generated_at"] = datetime.utcnow().isoformat() + "Z"
-
-            try:
-                supabase_request(
-                    "PATCH",
-                    f"fcc_filings?file_number=eq.{file_number}&filing_system=eq.ECFS",
-                    patch_data,
-                )
-                log(f"    ✓ Updated")
-                success += 1
-            except Exception as e:
-                log(f"    ✗ PATCH failed: {e}")
-                failed += 1
+            finishing.append(finisher.submit(finish, filing, content_text, storage_path))
 
             time.sleep(CONTENT_EXTRACT_DELAY)
 
     finally:
         browser.close()
         pw.stop()
+        finisher.shutdown(wait=True)
+
+    for done in finishing:
+        if done.result():
+            success += 1
+        else:
+            failed += 1
 
     log("=" * 60)
     log(f"Content extraction complete: {success} success, {failed} failed")
@@ -988,24 +1202,16 @@ def run_worker(args):
     # Sync docket metadata before processing filings
     sync_docket_metadata(dry_run=args.dry_run)
 
-    # Discover all filings
-    all_filings = discover_all_filings(args.docket)
-    log(f"Total filings discovered: {len(all_filings)}")
-
-    # Get existing filings
-    existing = get_existing_ecfs_filings()
-    log(f"Already in database: {len(existing)}")
-
-    # Determine what to process
+    # Discover filings, dropping already-stored ones as pages arrive
+    # unless this is a backfill (which reprocesses everything, so the
+    # stored IDs aren't needed)
     if args.backfill:
-        to_process = all_filings
+        to_process = discover_all_filings(args.docket)
         log(f"Backfill mode: processing all {len(to_process)} filings")
     else:
-        to_process = []
-        for f in all_filings:
-            fid = str(f.get("id_submission") or f.get("id_long") or f.get("id"))
-            if fid not in existing:
-                to_process.append(f)
+        existing = get_existing_ecfs_filings()
+        log(f"Already in database: {len(existing)}")
+        to_process = discover_all_filings(args.docket, skip_ids=existing)
         log(f"New filings to process: {len(to_process)}")
 
     if not to_process:
@@ -1014,7 +1220,7 @@ def run_worker(args):
 
     # Sort by date (newest first for regular runs, oldest first for backfill)
     to_process.sort(
-        key=lambda x: x.get("date_received", ""),
+        key=operator.itemgetter("date_received"),
         reverse=not args.backfill
     )
 
@@ -1026,18 +1232,48 @@ def run_worker(args):
     log("-" * 60)
     success = 0
     failed = 0
+    pending: List[Dict] = []
 
-    for i, filing in enumerate(to_process):
+    def flush() -> None:
+        nonlocal success, failed
+        try:
+            upsert_fcc_filings(pending)
+            log(f"Upserted {len(pending)} filings")
+        except Exception as e:
+            log(f"  ✗ Bulk upsert of {len(pending)} filings failed: {e}")
+            success -= len(pending)
+            failed += len(pending)
+        pending.clear()
+
+    def work(item) -> tuple[bool, List[Dict]]:
+        # Each filing queues into its own list; only the main thread
+        # touches pending, so flush() never races an append
+        i, filing = item
         log(f"[{i+1}/{len(to_process)}]")
+        rows: List[Dict] = []
+        ok = process_filing(filing, rows, dry_run=args.dry_run, fetch_content=not args.no_content)
+        return ok, rows
+
+    # Filings are network-bound (PDF downloads, Storage uploads), so a few
+    # run at once; results come back in order for batching and progress
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = pool.map(work, enumerate(to_process))
+        for i, (ok, rows) in enumerate(results):
+            if ok:
+                success += 1
+            else:
+                failed += 1
+            pending.extend(rows)
 
-        if process_filing(filing, dry_run=args.dry_run, fetch_content=not args.no_content):
-            success += 1
-        else:
-            failed += 1
+            if len(pending) >= UPSERT_BATCH_SIZE:
+                flush()
+
+            # Progress report
+            if (i + 1) % 25 == 0:
+                log(f"Progress: {i+1}/{len(to_process)} ({success} success, {failed} failed)")
 
-        # Progress report
-        if (i + 1) % 25 == 0:
-            log(f"Progress: {i+1}/{len(to_process)} ({success} success, {failed} failed)")
+    if pending:
+        flush()
 
     log("=" * 60)
     log(f"Completed: {success} success, {failed} failed")
@@ -1052,8 +1288,13 @@ if __name__ == "__main__":
     parser.add_argument("--no-content", action="store_true", help="Skip fetching document content")
     parser.add_argument("--extract-content", action="store_true", help="Phase 2: Playwright PDF extraction for filings missing content_text")
     parser.add_argument("--limit", type=int, help="Limit number of filings to process")
+    parser.add_argument("--workers", type=int, default=FILING_WORKERS, help=f"Filings processed concurrently (default {FILING_WORKERS})")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk FCC API response and PDF caches")
+    parser.add_argument("--pdf-cache-dir", default=PDF_CACHE_DIR, help="Directory for downloaded attachment PDFs")
 
     args = parser.parse_args()
+    response_cache.enabled = not args.no_cache
+    PDF_CACHE_DIR = None if args.no_cache else args.pdf_cache_dir
 
     if args.extract_content:
         backfill_content(args)
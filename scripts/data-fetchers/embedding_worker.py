@@ -27,11 +27,12 @@ import json
 import os
 import re
 import sys
-import time
-import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
+
+import http_pool
 
 # =============================================================================
 # CONFIGURATION
@@ -50,7 +51,7 @@ CHUNK_OVERLAP_CHARS = 200
 
 # OpenAI batch limits
 EMBED_BATCH_SIZE = 50  # texts per API call (max 2048, but stay conservative)
-EMBED_DELAY = 0.5      # seconds between batches
+EMBED_WORKERS = 4      # batches in flight at once (429s back off via Retry-After)
 
 # Supabase upsert batch
 UPSERT_BATCH_SIZE = 100
@@ -70,22 +71,22 @@ def http_request(url: str, method: str = "GET", headers: Dict = None,
     body = None
     if data:
         if isinstance(data, (dict, list)):
-            body = json.dumps(data).encode()
+            body = json.dumps(data, separators=(",", ":")).encode()
             headers.setdefault("Content-Type", "application/json")
         elif isinstance(data, str):
             body = data.encode()
         else:
             body = data
 
-    req = urllib.request.Request(url, data=body, headers=headers, method=method)
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        return resp.read()
+    # Keep-alive connections to Supabase and OpenAI; 429/5xx are retried
+    # with backoff, honouring Retry-After
+    return http_pool.request_with_retry(method, url, headers, body, timeout=timeout, log=log)[2]
 
 
 def http_json(url: str, method: str = "GET", headers: Dict = None,
               data: Any = None) -> Any:
     resp = http_request(url, method, headers, data)
-    return json.loads(resp.decode())
+    return json.loads(resp)
 
 
 # =============================================================================
@@ -105,27 +106,25 @@ def supabase_get(endpoint: str) -> List[Dict]:
     url = f"{SUPABASE_URL}/rest/v1/{endpoint}"
     try:
         resp = http_request(url, "GET", supabase_headers())
-        return json.loads(resp.decode())
+        return json.loads(resp)
     except urllib.error.HTTPError as e:
         error = e.read().decode() if e.fp else ""
         log(f"  Supabase GET error {e.code}: {error[:200]}")
         return []
 
 
-def supabase_paginate(endpoint: str, page_size: int = 1000) -> List[Dict]:
-    """Paginate through all results."""
-    all_results = []
+def supabase_iter(endpoint: str, page_size: int = 1000) -> Iterator[Dict]:
+    """Yield all results page by page, so callers never hold the whole table."""
     offset = 0
+    sep = "&" if "?" in endpoint else "?"
     while True:
-        sep = "&" if "?" in endpoint else "?"
         page = supabase_get(f"{endpoint}{sep}limit={page_size}&offset={offset}")
         if not page:
-            break
-        all_results.extend(page)
+            return
+        yield from page
         if len(page) < page_size:
-            break
+            return
         offset += page_size
-    return all_results
 
 
 def supabase_upsert(table: str, rows: List[Dict],
@@ -156,12 +155,17 @@ def supabase_upsert(table: str, rows: List[Dict],
 # OPENAI EMBEDDINGS
 # =============================================================================
 
-def get_embeddings(texts: List[str]) -> List[List[float]]:
-    """Get embeddings for a batch of texts from OpenAI."""
+def get_embeddings(texts: List[str]) -> List[List[str]]:
+    """Get embeddings for a batch of texts from OpenAI.
+
+    Components are returned as the decimal strings OpenAI sent: they only go
+    back out as pgvector text, so parsing 1536 floats per text just to
+    repr() them again would dominate the batch's CPU time.
+    """
     if not texts:
         return []
 
-    resp = http_json(
+    raw = http_request(
         "https://api.openai.com/v1/embeddings",
         method="POST",
         headers={
@@ -173,9 +177,10 @@ def get_embeddings(texts: List[str]) -> List[List[float]]:
             "input": texts,
         },
     )
+    resp = json.loads(raw, parse_float=str, parse_int=str)
 
     # Sort by index to maintain order
-    sorted_data = sorted(resp["data"], key=lambda x: x["index"])
+    sorted_data = sorted(resp["data"], key=lambda x: int(x["index"]))
     return [item["embedding"] for item in sorted_data]
 
 
@@ -235,13 +240,14 @@ def content_hash(text: str) -> str:
 def extract_patents(dry_run: bool = False) -> List[Dict]:
     """Extract chunks from patents table."""
     log("Fetching patents...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "patents?select=patent_number,title,abstract,content_text,grant_date,source_url,family_id"
     )
-    log(f"  Found {len(rows)} patents")
 
     chunks = []
+    found = 0
     for row in rows:
+        found += 1
         patent_number = row.get("patent_number", "")
         title = row.get("title", "")
         text = row.get("content_text") or row.get("abstract") or ""
@@ -269,6 +275,7 @@ def extract_patents(dry_run: bool = False) -> List[Dict]:
                 }),
             })
 
+    log(f"  Found {found} patents")
     log(f"  Chunked into {len(chunks)} segments")
     return chunks
 
@@ -276,20 +283,21 @@ def extract_patents(dry_run: bool = False) -> List[Dict]:
 def extract_patent_claims(dry_run: bool = False) -> List[Dict]:
     """Extract chunks from patent_claims table. Each claim = 1 chunk."""
     log("Fetching patent claims...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "patent_claims?select=id,patent_number,claim_number,claim_text,claim_type"
     )
-    log(f"  Found {len(rows)} claims")
 
     # Build patent_number → family_id lookup
-    patent_families = supabase_paginate(
+    patent_families = supabase_iter(
         "patents?select=patent_number,family_id&family_id=not.is.null"
     )
     family_map = {p["patent_number"]: p["family_id"] for p in patent_families}
     log(f"  Loaded {len(family_map)} patent→family mappings")
 
     chunks = []
+    found = 0
     for row in rows:
+        found += 1
         claim_text = row.get("claim_text", "").strip()
         if not claim_text:
             continue
@@ -316,6 +324,7 @@ def extract_patent_claims(dry_run: bool = False) -> List[Dict]:
             }),
         })
 
+    log(f"  Found {found} claims")
     log(f"  {len(chunks)} claim chunks")
     return chunks
 
@@ -428,16 +437,17 @@ def extract_filings(dry_run: bool = False) -> List[Dict]:
     - Stores section name in chunk metadata
     """
     log("Fetching SEC filings...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "filings?select=accession_number,form,filing_date,summary,url,content_text"
         "&status=eq.completed"
     )
-    log(f"  Found {len(rows)} filings")
 
     chunks = []
     section_aware_count = 0
 
+    found = 0
     for row in rows:
+        found += 1
         accession = row.get("accession_number", "")
         form = row.get("form", "")
         filing_date = row.get("filing_date", "")
@@ -518,6 +528,7 @@ def extract_filings(dry_run: bool = False) -> List[Dict]:
                     }),
                 })
 
+    log(f"  Found {found} filings")
     log(f"  Chunked into {len(chunks)} segments ({section_aware_count} section-aware filings)")
     return chunks
 
@@ -525,13 +536,14 @@ def extract_filings(dry_run: bool = False) -> List[Dict]:
 def extract_fcc_filings(dry_run: bool = False) -> List[Dict]:
     """Extract chunks from FCC filings table."""
     log("Fetching FCC filings...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "fcc_filings?select=id,file_number,title,filed_date,ai_summary,source_url,content_text"
     )
-    log(f"  Found {len(rows)} FCC filings")
 
     chunks = []
+    found = 0
     for row in rows:
+        found += 1
         file_number = row.get("file_number") or row.get("id", "")
         title = row.get("title", "")
 
@@ -561,6 +573,7 @@ def extract_fcc_filings(dry_run: bool = False) -> List[Dict]:
                 }),
             })
 
+    log(f"  Found {found} FCC filings")
     log(f"  Chunked into {len(chunks)} segments")
     return chunks
 
@@ -568,14 +581,15 @@ def extract_fcc_filings(dry_run: bool = False) -> List[Dict]:
 def extract_press_releases(dry_run: bool = False) -> List[Dict]:
     """Extract chunks from press_releases table."""
     log("Fetching press releases...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "press_releases?select=source_id,title,published_at,url,summary,content_text"
         "&status=eq.completed"
     )
-    log(f"  Found {len(rows)} press releases")
 
     chunks = []
+    found = 0
     for row in rows:
+        found += 1
         source_id = row.get("source_id", "")
         title = row.get("title", "")
         published_at = row.get("published_at", "")
@@ -609,6 +623,7 @@ def extract_press_releases(dry_run: bool = False) -> List[Dict]:
                 }),
             })
 
+    log(f"  Found {found} press releases")
     log(f"  Chunked into {len(chunks)} segments")
     return chunks
 
@@ -616,15 +631,16 @@ def extract_press_releases(dry_run: bool = False) -> List[Dict]:
 def extract_earnings_transcripts(dry_run: bool = False) -> List[Dict]:
     """Extract chunks from earnings call transcripts (inbox table, source=earnings_call)."""
     log("Fetching earnings call transcripts...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "inbox?select=id,source_id,title,published_at,url,summary,content_text"
         "&source=eq.earnings_call"
         "&status=eq.completed"
     )
-    log(f"  Found {len(rows)} transcripts")
 
     chunks = []
+    found = 0
     for row in rows:
+        found += 1
         source_id = row.get("source_id") or str(row.get("id", ""))
         title = row.get("title", "")
         published_at = row.get("published_at", "")
@@ -658,6 +674,7 @@ def extract_earnings_transcripts(dry_run: bool = False) -> List[Dict]:
                 }),
             })
 
+    log(f"  Found {found} transcripts")
     log(f"  Chunked into {len(chunks)} segments")
     return chunks
 
@@ -847,13 +864,14 @@ def extract_constellation_knowledge(dry_run: bool = False) -> List[Dict]:
 def extract_x_posts(dry_run: bool = False) -> List[Dict]:
     """Extract chunks from x_posts table. Each tweet = 1 chunk (already short)."""
     log("Fetching X posts (classified only)...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "x_posts?select=source_id,tweet_id,author_username,content_text,published_at,summary,sentiment,signal_type,url&sentiment=not.is.null"
     )
-    log(f"  Found {len(rows)} X posts")
 
     chunks = []
+    found = 0
     for row in rows:
+        found += 1
         source_id = row.get("source_id", "")
         username = row.get("author_username", "")
         text = row.get("content_text", "").strip()
@@ -887,6 +905,7 @@ def extract_x_posts(dry_run: bool = False) -> List[Dict]:
             }),
         })
 
+    log(f"  Found {found} X posts")
     log(f"  {len(chunks)} tweet chunks")
     return chunks
 
@@ -894,15 +913,16 @@ def extract_x_posts(dry_run: bool = False) -> List[Dict]:
 def extract_fcc_attachments(dry_run: bool = False) -> List[Dict]:
     """Extract chunks from fcc_filing_attachments table (technical docs, PDFs)."""
     log("Fetching FCC filing attachments...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "fcc_filing_attachments?select=id,file_number,filename,description,content_text,fetched_at"
         "&content_text=not.is.null"
         "&order=file_number.asc"
     )
-    log(f"  Found {len(rows)} attachments with content")
 
     chunks = []
+    found = 0
     for row in rows:
+        found += 1
         source_id = f"{row.get('file_number', '')}:{row.get('id', '')}"
         filename = row.get("filename", "")
         file_number = row.get("file_number", "")
@@ -939,6 +959,7 @@ def extract_fcc_attachments(dry_run: bool = False) -> List[Dict]:
                 }),
             })
 
+    log(f"  Found {found} attachments with content")
     log(f"  Chunked into {len(chunks)} segments")
     return chunks
 
@@ -946,15 +967,16 @@ def extract_fcc_attachments(dry_run: bool = False) -> List[Dict]:
 def extract_sec_exhibits(dry_run: bool = False) -> List[Dict]:
     """Extract chunks from sec_filing_exhibits table."""
     log("Fetching SEC filing exhibits...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "sec_filing_exhibits?select=id,accession_number,exhibit_number,exhibit_type,description,filename,content_text,fetched_at"
         "&content_text=not.is.null"
         "&order=accession_number.asc"
     )
-    log(f"  Found {len(rows)} exhibits with content")
 
     chunks = []
+    found = 0
     for row in rows:
+        found += 1
         accession = row.get("accession_number", "")
         exhibit_num = row.get("exhibit_number", "")
         source_id = f"{accession}:ex-{exhibit_num}"
@@ -991,6 +1013,7 @@ def extract_sec_exhibits(dry_run: bool = False) -> List[Dict]:
                 }),
             })
 
+    log(f"  Found {found} exhibits with content")
     log(f"  Chunked into {len(chunks)} segments")
     return chunks
 
@@ -998,15 +1021,16 @@ def extract_sec_exhibits(dry_run: bool = False) -> List[Dict]:
 def extract_inbox(dry_run: bool = False) -> List[Dict]:
     """Extract chunks from inbox table (news, press_release sources)."""
     log("Fetching inbox items...")
-    rows = supabase_paginate(
+    rows = supabase_iter(
         "inbox?select=id,source_id,source,title,published_at,url,summary,content_text"
         "&status=eq.completed"
         "&source=neq.earnings_call"
     )
-    log(f"  Found {len(rows)} inbox items")
 
     chunks = []
+    found = 0
     for row in rows:
+        found += 1
         source_id = row.get("source_id") or str(row.get("id", ""))
         title = row.get("title", "")
         published_at = row.get("published_at", "")
@@ -1041,6 +1065,7 @@ def extract_inbox(dry_run: bool = False) -> List[Dict]:
                 }),
             })
 
+    log(f"  Found {found} inbox items")
     log(f"  Chunked into {len(chunks)} segments")
     return chunks
 
@@ -1063,7 +1088,7 @@ TABLE_EXTRACTORS = {
 
 def get_existing_hashes(source_table: str) -> set:
     """Get existing content hashes to skip unchanged chunks."""
-    rows = supabase_paginate(
+    rows = supabase_iter(
         f"brain_chunks?select=source_id,chunk_index,content_hash"
         f"&source_table=eq.{source_table}"
     )
@@ -1082,43 +1107,47 @@ def embed_and_upsert(chunks: List[Dict], dry_run: bool = False) -> int:
     total_embedded = 0
     total_tokens = 0
 
-    for i in range(0, len(chunks), EMBED_BATCH_SIZE):
+    def embed_batch(i: int) -> tuple[int, int]:
+        """Embed and upsert chunks[i:i + EMBED_BATCH_SIZE]; returns (upserted, tokens)."""
         batch = chunks[i:i + EMBED_BATCH_SIZE]
         texts = [c["chunk_text"] for c in batch]
 
-        if dry_run:
-            total_embedded += len(batch)
-            continue
-
         try:
             embeddings = get_embeddings(texts)
         except Exception as e:
             log(f"  Embedding error at batch {i}: {e}")
-            continue
+            return 0, 0
 
         # Attach embeddings to chunks
         rows_to_upsert = []
         for chunk, embedding in zip(batch, embeddings):
             row = dict(chunk)
             # Convert embedding list to pgvector format string
-            row["embedding"] = f"[{','.join(str(x) for x in embedding)}]"
+            row["embedding"] = f"[{','.join(embedding)}]"
             rows_to_upsert.append(row)
 
         upserted = supabase_upsert(
             "brain_chunks", rows_to_upsert,
             on_conflict="source_table,source_id,chunk_index"
         )
-        total_embedded += upserted
 
         # Estimate tokens (~4 chars per token)
-        total_tokens += sum(len(t) for t in texts) // 4
-
-        if i + EMBED_BATCH_SIZE < len(chunks):
-            time.sleep(EMBED_DELAY)
-
-        # Progress
-        pct = min(100, int((i + len(batch)) / len(chunks) * 100))
-        log(f"  [{pct}%] Embedded {total_embedded}/{len(chunks)} chunks")
+        return upserted, sum(len(t) for t in texts) // 4
+
+    # OpenAI latency dominates each batch, so several are in flight at once;
+    # each thread upserts its own batch, so embeddings aren't held in memory
+    starts = range(0, len(chunks), EMBED_BATCH_SIZE)
+    if dry_run:
+        total_embedded = len(chunks)
+    else:
+        with ThreadPoolExecutor(max_workers=EMBED_WORKERS) as pool:
+            for i, (upserted, tokens) in zip(starts, pool.map(embed_batch, starts)):
+                total_embedded += upserted
+                total_tokens += tokens
+
+                # Progress
+                pct = min(100, int((i + EMBED_BATCH_SIZE) / len(chunks) * 100))
+                log(f"  [{pct}%] Embedded {total_embedded}/{len(chunks)} chunks")
 
     cost_estimate = total_tokens / 1_000_000 * 0.02
     log(f"  Done. ~{total_tokens:,} tokens, ~${cost_estimate:.4f} estimated cost")
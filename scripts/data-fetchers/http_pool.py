@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Keep-Alive HTTP Connection Pool
+
+Stdlib replacement for urllib.request.urlopen that reuses one TCP+TLS
+connection per host (per thread) instead of handshaking on every call.
+Used by workers that fire many small Supabase/API requests per run.
+Responses are requested gzip-compressed and decompressed transparently.
+Also provides request_with_retry (shared backoff policy), fetch_ranged
+(parallel byte-range downloads of large files) and TokenBucket for
+per-host rate limiting.
+
+Errors mirror urllib: HTTP status >= 400 raises urllib.error.HTTPError,
+so existing `except urllib.error.HTTPError` handlers keep working.
+"""
+
+import email.utils
+import gzip
+import http.client
+import io
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import urllib.error
+import urllib.parse
+from typing import Callable, Dict, Optional, Tuple
+
+MAX_REDIRECTS = 5
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+MAX_RETRY_AFTER = 300  # Cap on a server-requested wait, seconds
+RANGE_THRESHOLD = 8 * 1024 * 1024  # fetch_ranged splits files at least this large
+RANGE_CHUNK = 4 * 1024 * 1024
+
+# Errors that mean a kept-alive connection went stale between requests
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+_local = threading.local()
+
+
+def _get_connection(scheme: str, netloc: str, timeout: float) -> http.client.HTTPConnection:
+    """Return this thread's cached connection for scheme://netloc."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    key = (scheme, netloc)
+    conn = conns.get(key)
+    if conn is None:
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = cls(netloc, timeout=timeout)
+        conns[key] = conn
+    else:
+        conn.timeout = timeout
+        if conn.sock:
+            conn.sock.settimeout(timeout)
+    return conn
+
+
+def _drop_connection(scheme: str, netloc: str) -> None:
+    """Close and forget this thread's connection for scheme://netloc."""
+    conn = getattr(_local, "conns", {}).pop((scheme, netloc), None)
+    if conn:
+        conn.close()
+
+
+def request(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    body: Optional[bytes] = None,
+    timeout: float = 60,
+) -> Tuple[int, http.client.HTTPMessage, bytes]:
+    """
+    Make an HTTP request over a pooled keep-alive connection.
+
+    Sends Accept-Encoding: gzip unless the caller set Accept-Encoding, and
+    gunzips the body when the server honours it (headers are left as sent).
+
+    Returns:
+        (status, headers, body) — headers support case-insensitive .get()
+
+    Raises:
+        urllib.error.HTTPError on status >= 400
+    """
+    headers = dict(headers or {})
+    if not any(k.lower() == "accept-encoding" for k in headers):
+        headers["Accept-Encoding"] = "gzip"
+
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        # One retry on a fresh connection if the kept-alive one went stale
+        for attempt in range(2):
+            conn = _get_connection(parts.scheme, parts.netloc, timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except _STALE_ERRORS:
+                _drop_connection(parts.scheme, parts.netloc)
+                if attempt:
+                    raise
+            except Exception:
+                _drop_connection(parts.scheme, parts.netloc)
+                raise
+
+        if resp.will_close:
+            _drop_connection(parts.scheme, parts.netloc)
+
+        if data and resp.getheader("Content-Encoding", "").lower() == "gzip":
+            data = gzip.decompress(data)
+
+        location = resp.getheader("Location")
+        if resp.status in REDIRECT_CODES and location:
+            url = urllib.parse.urljoin(url, location)
+            if resp.status == 303:
+                method, body = "GET", None
+            continue
+
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.msg, io.BytesIO(data))
+
+        return resp.status, resp.msg, data
+
+    raise urllib.error.HTTPError(url, resp.status, "Too many redirects", resp.msg, io.BytesIO(data))
+
+
+def _retry_after(headers) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(when.timestamp() - time.time(), 0.0), MAX_RETRY_AFTER)
+
+
+def request_with_retry(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    body: Optional[bytes] = None,
+    timeout: float = 60,
+    retries: int = 3,
+    backoff: float = 1.0,
+    rate_limit_backoff: Optional[float] = None,
+    log: Optional[Callable[[str], None]] = None,
+) -> Tuple[int, http.client.HTTPMessage, bytes]:
+    """
+    request() with one retry policy for transient failures.
+
+    Retries connection errors and RETRY_STATUSES up to `retries` attempts in
+    total. The wait honours Retry-After when the server sends one; otherwise
+    it is backoff * 2**attempt (rate_limit_backoff for 429s) with jitter, so
+    concurrent callers that failed together don't retry in lockstep. Other
+    HTTP errors raise immediately.
+    """
+    for attempt in range(retries):
+        try:
+            return request(method, url, headers, body, timeout)
+        except urllib.error.HTTPError as e:
+            if e.code not in RETRY_STATUSES or attempt == retries - 1:
+                raise
+            wait = _retry_after(e.headers)
+            if wait is None:
+                base = rate_limit_backoff if e.code == 429 and rate_limit_backoff else backoff
+                wait = base * 2 ** attempt
+                wait = wait / 2 + random.uniform(0, wait / 2)
+            reason = f"HTTP {e.code}"
+        except (OSError, http.client.HTTPException) as e:
+            if attempt == retries - 1:
+                raise
+            wait = backoff * 2 ** attempt
+            wait = wait / 2 + random.uniform(0, wait / 2)
+            reason = type(e).__name__
+        if log:
+            log(f"  {reason} from {urllib.parse.urlsplit(url).netloc}, retrying in {wait:.1f}s...")
+        time.sleep(wait)
+    raise ValueError("retries must be at least 1")
+
+
+class _WholeBody(Exception):
+    """Raised inside fetch_ranged when a range request returned the full file."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def fetch_ranged(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 120,
+    retries: int = 3,
+    workers: int = 4,
+    log: Optional[Callable[[str], None]] = None,
+    min_size: int = 0,
+    pace: Optional[Callable[[], None]] = None,
+) -> bytes:
+    """
+    GET a possibly large file, as parallel byte ranges when worthwhile.
+
+    A HEAD learns the size first. Files of RANGE_THRESHOLD or more from a
+    server advertising Accept-Ranges: bytes are fetched as RANGE_CHUNK
+    ranges on `workers` threads (each on its own pooled connection) and
+    written in place into one buffer. Anything else, or any range that
+    doesn't come back as a matching 206, falls back to a single GET.
+
+    If the HEAD reports a non-zero Content-Length below min_size, the body
+    is never fetched and b"" is returned.
+
+    pace, if given (e.g. a TokenBucket's acquire), is called before the HEAD
+    and before every GET, so a host's rate limit covers each range request
+    rather than the file as a whole.
+    """
+    headers = dict(headers or {})
+    headers["Accept-Encoding"] = "identity"  # Ranges index the raw bytes
+
+    if pace:
+        pace()
+    try:
+        _, head, _ = request_with_retry("HEAD", url, headers, timeout=timeout, retries=retries, log=log)
+        length = int(head.get("Content-Length") or 0)
+        ranged = head.get("Accept-Ranges", "").lower() == "bytes"
+    except (urllib.error.HTTPError, ValueError):
+        length, ranged = 0, False
+
+    if 0 < length < min_size:
+        return b""
+
+    if ranged and length >= RANGE_THRESHOLD:
+        buf = bytearray(length)
+
+        def fetch(start: int) -> None:
+            end = min(start + RANGE_CHUNK, length) - 1
+            if pace:
+                pace()
+            status, _, data = request_with_retry(
+                "GET", url, {**headers, "Range": f"bytes={start}-{end}"},
+                timeout=timeout, retries=retries, log=log,
+            )
+            if status == 200 and len(data) == length:
+                raise _WholeBody(data)
+            if status != 206 or len(data) != end - start + 1:
+                raise ValueError(f"range {start}-{end} returned {status} ({len(data)} bytes)")
+            buf[start:end + 1] = data
+
+        try:
+            # First range alone: a server that ignores Range answers it with
+            # the whole file, which is then used as-is
+            fetch(0)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(fetch, range(RANGE_CHUNK, length, RANGE_CHUNK)))
+            return bytes(buf)
+        except _WholeBody as whole:
+            return whole.data
+        except ValueError as e:
+            if log:
+                log(f"  Ranged download failed ({e}), falling back to a single GET")
+
+    if pace:
+        pace()
+    return request_with_retry("GET", url, headers, timeout=timeout, retries=retries, log=log)[2]
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    acquire() blocks only until a token is available, so time already spent
+    on other work (parsing, DB writes, other hosts) counts toward the limit
+    instead of being followed by a fixed sleep.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate  # tokens per second
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1.0
+                self.updated = time.monotonic()
+            self.tokens -= 1
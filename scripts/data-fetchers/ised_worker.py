@@ -44,7 +44,6 @@ import re
 import sys
 import time
 import urllib.error
-import urllib.parse
 import urllib.request
 from datetime import datetime, timezone
 from html.parser import HTMLParser
@@ -68,6 +67,8 @@ USER_AGENT = "Short Gravity Research gabriel@shortgravity.com"
 RATE_LIMIT_SECONDS = 0.5
 MAX_RETRIES = 3
 
+UPSERT_BATCH_SIZE = 100  # fcc_filings rows per bulk upsert
+
 # Valid filing_system values per fcc_filings CHECK constraint
 VALID_FILING_SYSTEMS = {"ICFS", "ECFS", "ELS"}
 
@@ -244,7 +245,12 @@ def fetch_json(url: str) -> Dict:
 # Supabase Operations
 # ============================================================================
 
-def supabase_request(method: str, endpoint: str, data: Optional[Dict] = None) -> any:
+def supabase_request(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict | List[Dict]] = None,
+    prefer: str = "return=representation",
+) -> any:
     """Make Supabase REST API request."""
     if not SUPABASE_SERVICE_KEY:
         raise ValueError("SUPABASE_SERVICE_KEY not set")
@@ -254,7 +260,7 @@ def supabase_request(method: str, endpoint: str, data: Optional[Dict] = None) ->
         "apikey": SUPABASE_SERVICE_KEY,
         "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
         "Content-Type": "application/json",
-        "Prefer": "return=representation",
+        "Prefer": prefer,
     }
 
     body = json.dumps(data).encode() if data else None
@@ -283,36 +289,42 @@ def get_existing_ised_ids() -> Set[str]:
         return set()
 
 
-def upsert_ised_filing(filing: Dict) -> bool:
-    """Insert or update an ISED filing in fcc_filings."""
-    file_number = filing.get("file_number", "")
-    filing_system = filing.get("filing_system", "ICFS")
-
-    if filing_system not in VALID_FILING_SYSTEMS:
-        log(f"  ERROR: Invalid filing_system '{filing_system}' for {file_number} — must be one of {VALID_FILING_SYSTEMS}")
-        return False
-
-    try:
-        existing = supabase_request(
-            "GET",
-            f"fcc_filings?file_number=eq.{urllib.parse.quote(file_number)}"
-            f"&filing_system=eq.{filing_system}&select=id"
-        )
-
-        if existing:
-            supabase_request(
-                "PATCH",
-                f"fcc_filings?file_number=eq.{urllib.parse.quote(file_number)}"
-                f"&filing_system=eq.{filing_system}",
-                filing
-            )
-        else:
-            supabase_request("POST", "fcc_filings", filing)
+def upsert_ised_filings(filings: List[Dict]) -> Tuple[int, int]:
+    """Bulk upsert ISED filings into fcc_filings on (filing_system, file_number).
 
-        return True
-    except Exception as e:
-        log(f"  Database error for {file_number}: {e}")
-        return False
+    One POST per UPSERT_BATCH_SIZE rows instead of a GET plus PATCH/POST
+    per filing. PostgREST takes a bulk body's columns from its first row
+    and writes NULL for keys other rows lack, so rows are grouped by key
+    set first. Returns (success, failed) counts.
+    """
+    success = 0
+    failed = 0
+    groups: Dict[frozenset, List[Dict]] = {}
+    for filing in filings:
+        filing_system = filing.get("filing_system", "ICFS")
+        if filing_system not in VALID_FILING_SYSTEMS:
+            log(f"  ERROR: Invalid filing_system '{filing_system}' for {filing.get('file_number', '')} — must be one of {VALID_FILING_SYSTEMS}")
+            failed += 1
+            continue
+        filing = {**filing, "filing_system": filing_system}
+        groups.setdefault(frozenset(filing), []).append(filing)
+
+    for rows in groups.values():
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[i:i + UPSERT_BATCH_SIZE]
+            try:
+                supabase_request(
+                    "POST",
+                    "fcc_filings?on_conflict=filing_system,file_number",
+                    batch,
+                    prefer="resolution=merge-duplicates,return=minimal",
+                )
+                success += len(batch)
+            except Exception as e:
+                log(f"  Database error for batch of {len(batch)}: {e}")
+                failed += len(batch)
+
+    return success, failed
 
 
 # ============================================================================
@@ -863,26 +875,16 @@ def run_worker(args: argparse.Namespace) -> None:
         return
 
     # Write to database
-    success = 0
-    failed = 0
-
     for i, record in enumerate(new_records):
         fn = record["file_number"]
         title = record.get("title", "")[:60]
+        dry = "[DRY RUN] " if args.dry_run else ""
+        log(f"  [{i+1}/{len(new_records)}] {dry}{fn}: {title}")
 
-        if args.dry_run:
-            log(f"  [{i+1}/{len(new_records)}] [DRY RUN] {fn}: {title}")
-            success += 1
-            continue
-
-        log(f"  [{i+1}/{len(new_records)}] {fn}: {title}")
-        if upsert_ised_filing(record):
-            success += 1
-        else:
-            failed += 1
-
-        if (i + 1) % 10 == 0:
-            time.sleep(RATE_LIMIT_SECONDS)
+    if args.dry_run:
+        success, failed = len(new_records), 0
+    else:
+        success, failed = upsert_ised_filings(new_records)
 
     log("=" * 60)
     log(f"Completed: {success} success, {failed} failed")
@@ -26,18 +26,20 @@ Environment:
 
 import argparse
 import base64
-import hashlib
 import json
 import os
 import re
 import sys
 import time
-import urllib.request
+import urllib.parse
 import urllib.error
-from datetime import datetime
-from typing import Dict, List, Optional, Set, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Any, Tuple
 from collections import defaultdict
 
+import http_pool
+from storage_utils import compute_hash
+
 # Optional: Playwright for Google Patents scraping
 try:
     from playwright.sync_api import sync_playwright
@@ -56,6 +58,12 @@ PATENTSVIEW_ASSIGNEE_IDS = {
     "AST & Science, LLC": "cacf699f-e783-4e35-840c-d1bcea17a2d4",
     "AST&Defense, LLC": "3e2e5dcb-b36d-4ed4-b211-292bf19edd97",
 }
+# (our column, PatentsView field) pairs copied straight across per patent
+PATENTSVIEW_FIELD_MAP = (
+    ("title", "patent_title"),
+    ("abstract", "patent_abstract"),
+    ("grant_date", "patent_date"),
+)
 
 # EPO OPS
 EPO_CONSUMER_KEY = os.environ.get("EPO_CONSUMER_KEY", "")
@@ -66,45 +74,71 @@ EPO_API_BASE = "https://ops.epo.org/3.2/rest-services"
 # Supabase
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
 SUPABASE_SERVICE_KEY = os.environ.get("SUPABASE_SERVICE_KEY", "")
+SUPABASE_PAGE_WORKERS = 8  # Concurrent Range requests in supabase_paginate
+UPSERT_BATCH_SIZE = 500
 
 # Rate limits
 PATENTSVIEW_DELAY = 1.5  # 45 req/min
 EPO_DELAY = 3.0  # 20 req/min
 GOOGLE_PATENTS_DELAY = 2.5
 
+# Per-host buckets: each host's budget is spent independently, and work done
+# between calls counts toward the interval instead of adding a fixed sleep
+PATENTSVIEW_BUCKET = http_pool.TokenBucket(1 / PATENTSVIEW_DELAY)
+EPO_BUCKET = http_pool.TokenBucket(1 / EPO_DELAY)
+GOOGLE_PATENTS_BUCKET = http_pool.TokenBucket(1 / GOOGLE_PATENTS_DELAY)
+
+
+_log_second = None
+_log_stamp = ""
+
 
 def log(msg: str):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+    # Format the timestamp at most once per second; claims/enrichment loops log per item
+    global _log_second, _log_stamp
+    now = int(time.time())
+    if now != _log_second:
+        _log_second = now
+        _log_stamp = time.strftime("%H:%M:%S", time.localtime(now))
+    print(f"[{_log_stamp}] {msg}")
 
 
 # =============================================================================
 # HTTP UTILITIES
 # =============================================================================
 
-def http_request(url: str, method: str = "GET", headers: Dict = None,
-                 data: Any = None, timeout: int = 60) -> bytes:
-    """Make HTTP request and return response bytes."""
+def http_response(url: str, method: str = "GET", headers: Dict = None,
+                  data: Any = None, timeout: int = 60) -> Tuple[bytes, Any]:
+    """Make HTTP request over a pooled keep-alive connection.
+
+    Returns response bytes and headers (case-insensitive .get()).
+    """
     headers = headers or {}
     body = None
     if data:
-        if isinstance(data, dict):
-            body = json.dumps(data).encode()
+        if isinstance(data, (dict, list)):
+            body = json.dumps(data, separators=(",", ":")).encode()
             headers.setdefault("Content-Type", "application/json")
         elif isinstance(data, str):
             body = data.encode()
         else:
             body = data
 
-    req = urllib.request.Request(url, data=body, headers=headers, method=method)
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        return resp.read()
+    _, resp_headers, resp = http_pool.request(method, url, headers, body, timeout)
+    return resp, resp_headers
+
+
+def http_request(url: str, method: str = "GET", headers: Dict = None,
+                 data: Any = None, timeout: int = 60) -> bytes:
+    """Make HTTP request and return response bytes."""
+    return http_response(url, method, headers, data, timeout)[0]
 
 
 def http_json(url: str, method: str = "GET", headers: Dict = None,
               data: Any = None) -> Dict:
     """Make HTTP request and return JSON."""
     resp = http_request(url, method, headers, data)
-    return json.loads(resp.decode())
+    return json.loads(resp)
 
 
 # =============================================================================
@@ -122,47 +156,107 @@ def supabase_request(method: str, endpoint: str, data: Any = None) -> Any:
     }
     try:
         resp = http_request(url, method, headers, data)
-        return json.loads(resp.decode()) if resp else []
+        return json.loads(resp) if resp else []
     except urllib.error.HTTPError as e:
         error = e.read().decode() if e.fp else ""
         raise Exception(f"Supabase {e.code}: {error[:200]}")
 
 
-def supabase_paginate(endpoint: str, page_size: int = 1000) -> List[Dict]:
-    """Paginate through all Supabase results to avoid 1000 row limit."""
-    all_results = []
-    offset = 0
+def supabase_range(endpoint: str, start: int, end: int,
+                   count: bool = False) -> Tuple[List[Dict], Optional[int]]:
+    """Fetch rows start..end (inclusive) of a query via PostgREST Range headers.
+
+    With count=True the exact total row count is parsed from Content-Range.
+    """
+    url = f"{SUPABASE_URL}/rest/v1/{endpoint}"
+    headers = {
+        "apikey": SUPABASE_SERVICE_KEY,
+        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+        "Range-Unit": "items",
+        "Range": f"{start}-{end}",
+    }
+    if count:
+        headers["Prefer"] = "count=exact"
+    try:
+        resp, resp_headers = http_response(url, "GET", headers)
+    except urllib.error.HTTPError as e:
+        error = e.read().decode() if e.fp else ""
+        raise Exception(f"Supabase {e.code}: {error[:200]}")
 
-    while True:
-        # Add pagination params
-        sep = "&" if "?" in endpoint else "?"
-        paginated = f"{endpoint}{sep}limit={page_size}&offset={offset}"
-        results = supabase_request("GET", paginated)
+    rows = json.loads(resp) if resp else []
 
-        if not results:
-            break
+    # Content-Range looks like "0-999/5432" (or "*/0" when empty)
+    total = None
+    content_range = resp_headers.get("Content-Range", "")
+    if "/" in content_range:
+        tail = content_range.rsplit("/", 1)[1]
+        if tail.isdigit():
+            total = int(tail)
+    return rows, total
 
-        all_results.extend(results)
 
-        if len(results) < page_size:
-            break
+def supabase_paginate(endpoint: str, page_size: int = 1000) -> List[Dict]:
+    """Paginate through all Supabase results to avoid 1000 row limit.
+
+    The first page also returns the exact row count, so the remaining pages
+    are requested concurrently and concatenated in order.
+    """
+    first, total = supabase_range(endpoint, 0, page_size - 1, count=True)
+    if total is None or total <= len(first) or not first:
+        return first
+
+    # Server-side max-rows may cap pages below the requested size
+    page_size = min(page_size, len(first))
+
+    def fetch_page(start: int) -> List[Dict]:
+        return supabase_range(endpoint, start, start + page_size - 1)[0]
 
-        offset += page_size
+    all_results = list(first)
+    with ThreadPoolExecutor(max_workers=SUPABASE_PAGE_WORKERS) as pool:
+        for rows in pool.map(fetch_page, range(len(first), total, page_size)):
+            all_results.extend(rows)
 
     return all_results
 
 
+def supabase_upsert(table: str, rows: List[Dict], on_conflict: str) -> int:
+    """Bulk upsert rows in batches. Returns count of rows upserted."""
+    if not rows:
+        return 0
+
+    url = f"{SUPABASE_URL}/rest/v1/{table}?on_conflict={on_conflict}"
+    headers = {
+        "apikey": SUPABASE_SERVICE_KEY,
+        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+        "Content-Type": "application/json",
+        "Prefer": "resolution=merge-duplicates,return=minimal",
+    }
+
+    count = 0
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[i:i + UPSERT_BATCH_SIZE]
+        try:
+            http_request(url, "POST", dict(headers), batch)
+            count += len(batch)
+        except urllib.error.HTTPError as e:
+            error = e.read().decode() if e.fp else ""
+            log(f"  Upsert error {e.code}: {error[:300]}")
+    return count
+
+
 def get_existing_patents() -> Set[str]:
     """Get all patent numbers currently in database."""
     patents = supabase_paginate("patents?select=patent_number")
     return {p["patent_number"] for p in patents}
 
 
-def get_patents_missing_claims() -> List[str]:
-    """Get patents that don't have claims in patent_claims table."""
-    # Get all patents (paginated)
-    patents = supabase_paginate("patents?select=patent_number")
-    all_patents = {p["patent_number"] for p in patents}
+def get_patents_missing_claims(all_patents: Optional[Set[str]] = None) -> List[str]:
+    """Get patents that don't have claims in patent_claims table.
+
+    Pass an already-loaded set of patent numbers to skip re-paginating patents.
+    """
+    if all_patents is None:
+        all_patents = get_existing_patents()
 
     # Get patents with claims (paginated)
     claims = supabase_paginate("patent_claims?select=patent_number")
@@ -199,6 +293,7 @@ def patentsview_request(endpoint: str, query: Dict, fields: List[str],
     }
     body = {"q": query, "f": fields, "o": {"size": size}}
 
+    PATENTSVIEW_BUCKET.acquire()
     try:
         return http_json(url, "POST", headers, body)
     except Exception as e:
@@ -211,10 +306,9 @@ def patentsview_fetch_patents() -> List[Dict]:
 
     for assignee_name, assignee_id in PATENTSVIEW_ASSIGNEE_IDS.items():
         query = {"_eq": {"assignees.assignee_id": assignee_id}}
-        fields = [
-            "patent_id", "patent_title", "patent_date", "patent_type",
-            "patent_abstract", "assignees", "inventors", "cpc_current"
-        ]
+        # Only request what we store: nested assignees/inventors/cpc blocks
+        # dominated the response size and were never read
+        fields = ["patent_id"] + [src for _, src in PATENTSVIEW_FIELD_MAP]
 
         result = patentsview_request("patent", query, fields, size=200)
         if result.get("error"):
@@ -225,18 +319,15 @@ def patentsview_fetch_patents() -> List[Dict]:
         for p in patents:
             # Convert to our format
             patent_id = p["patent_id"]
-            all_patents.append({
-                "patent_number": f"US{patent_id}B2",  # Assume B2 for modern patents
-                "patent_id": patent_id,
-                "title": p.get("patent_title"),
-                "abstract": p.get("patent_abstract"),
-                "grant_date": p.get("patent_date"),
-                "assignee": assignee_name,
-                "status": "granted",
-                "source": "patentsview",
-            })
-
-        time.sleep(PATENTSVIEW_DELAY)
+            row = {out: p.get(src) for out, src in PATENTSVIEW_FIELD_MAP}
+            row.update(
+                patent_number=f"US{patent_id}B2",  # Assume B2 for modern patents
+                patent_id=patent_id,
+                assignee=assignee_name,
+                status="granted",
+                source="patentsview",
+            )
+            all_patents.append(row)
 
     return all_patents
 
@@ -278,7 +369,7 @@ def epo_get_token() -> str:
     }
 
     resp = http_request(EPO_AUTH_URL, "POST", headers, "grant_type=client_credentials")
-    data = json.loads(resp.decode())
+    data = json.loads(resp)
 
     _epo_token = data["access_token"]
     _epo_token_expires = time.time() + int(data.get("expires_in", 1200)) - 60
@@ -296,9 +387,10 @@ def epo_search(query: str) -> List[Dict]:
     }
     params = urllib.parse.urlencode({"q": query, "Range": "1-100"})
 
+    EPO_BUCKET.acquire()
     try:
         resp = http_request(f"{url}?{params}", "GET", headers)
-        return json.loads(resp.decode())
+        return json.loads(resp)
     except Exception as e:
         log(f"  EPO search error: {e}")
         return {}
@@ -308,18 +400,18 @@ def epo_fetch_family_patents() -> List[Dict]:
     """Fetch ASTS patent families from EPO OPS."""
     patents = []
 
-    # Search for AST SpaceMobile patents
-    queries = [
+    # Search for AST SpaceMobile patents: both applicant names in one CQL
+    # OR query instead of one search per name
+    applicants = [
         'pa="AST & Science"',
         'pa="AST SpaceMobile"',
     ]
+    query = " or ".join(applicants)
 
-    for query in queries:
-        result = epo_search(query)
-        # Parse EPO response format
-        # (EPO returns complex XML/JSON - simplified here)
-        # In practice, need to parse exchange-documents
-        time.sleep(EPO_DELAY)
+    result = epo_search(query)
+    # Parse EPO response format
+    # (EPO returns complex XML/JSON - simplified here)
+    # In practice, need to parse exchange-documents
 
     return patents
 
@@ -332,6 +424,7 @@ def scrape_google_patent(page, patent_number: str) -> Dict:
     """Scrape patent data from Google Patents."""
     url = f"https://patents.google.com/patent/{patent_number}/en"
 
+    GOOGLE_PATENTS_BUCKET.acquire()
     try:
         # Use domcontentloaded instead of networkidle - more reliable, doesn't hang
         page.goto(url, wait_until="domcontentloaded", timeout=20000)
@@ -381,6 +474,7 @@ def scrape_google_patent_claims(page, patent_number: str) -> List[Dict]:
     """Scrape claims from Google Patents for international patents (EP, AU, CA, etc.)."""
     url = f"https://patents.google.com/patent/{patent_number}/en"
 
+    GOOGLE_PATENTS_BUCKET.acquire()
     try:
         page.goto(url, wait_until="domcontentloaded", timeout=20000)
         page.wait_for_timeout(2500)  # Wait for JS to render claims
@@ -493,7 +587,6 @@ def enrich_patents_google(patents: List[Dict], dry_run: bool = False) -> int:
 
                 if data.get("error"):
                     log(f"    -> Error: {data['error']}")
-                    time.sleep(GOOGLE_PATENTS_DELAY)
                     continue
 
                 # Build update
@@ -511,8 +604,6 @@ def enrich_patents_google(patents: List[Dict], dry_run: bool = False) -> int:
                     log(f"    -> Updated: {list(updates.keys())}")
                 elif updates:
                     log(f"    -> Would update: {list(updates.keys())}")
-
-                time.sleep(GOOGLE_PATENTS_DELAY)
         finally:
             browser.close()
 
@@ -553,8 +644,8 @@ def parse_depends_on(text: str) -> Optional[List[int]]:
 
 
 def insert_claims(patent_number: str, claims: List[Dict], dry_run: bool = False) -> int:
-    """Insert claims into patent_claims table."""
-    inserted = 0
+    """Upsert claims into patent_claims table in one bulk request."""
+    rows = []
 
     for claim in claims:
         claim_num = claim.get("claim_sequence") or claim.get("claim_number")
@@ -563,32 +654,41 @@ def insert_claims(patent_number: str, claims: List[Dict], dry_run: bool = False)
         if not claim_num or not claim_text:
             continue
 
-        data = {
+        # Bulk POST requires every row to carry the same keys
+        rows.append({
             "patent_number": patent_number,
             "claim_number": int(claim_num),
             "claim_text": claim_text,
             "claim_type": parse_claim_type(claim_text),
-        }
+            "depends_on": parse_depends_on(claim_text),
+        })
 
-        depends = parse_depends_on(claim_text)
-        if depends:
-            data["depends_on"] = depends
-
-        if not dry_run:
-            try:
-                supabase_request("POST", "patent_claims", data)
-                inserted += 1
-            except Exception as e:
-                if "duplicate" not in str(e).lower():
-                    log(f"    Error inserting claim: {e}")
+    if dry_run:
+        return 0
 
-    return inserted
+    return supabase_upsert("patent_claims", rows, "patent_number,claim_number")
 
 
 # =============================================================================
 # DEDUPLICATION & RAG
 # =============================================================================
 
+def split_us_patent(pn: str) -> Optional[Tuple[str, str]]:
+    """Split a US patent number into (digits, kind): US11223344B2 -> ("11223344", "B2").
+
+    Plain slicing + str.isdigit() instead of a regex per row; kind code is
+    optional (US11223344 -> ("11223344", "")).
+    """
+    if not pn.startswith("US"):
+        return None
+    if pn[2:].isdigit():
+        return pn[2:], ""
+    digits, kind = pn[2:-2], pn[-2:]
+    if digits.isdigit() and kind[0].isalpha() and kind[1].isdigit():
+        return digits, kind
+    return None
+
+
 def dedupe_b1_b2(dry_run: bool = False) -> int:
     """Remove B1 patents when B2 exists."""
     patents = supabase_paginate("patents?select=patent_number")
@@ -597,45 +697,50 @@ def dedupe_b1_b2(dry_run: bool = False) -> int:
     by_base = defaultdict(list)
     for p in patents:
         pn = p["patent_number"]
-        match = re.match(r'^(US\d+)(B\d)$', pn)
-        if match:
-            by_base[match.group(1)].append(pn)
+        parts = split_us_patent(pn)
+        if parts and parts[1].startswith("B"):
+            by_base[f"US{parts[0]}"].append(pn)
 
     # Find B1/B2 pairs
-    deleted = 0
+    to_delete = []
     for base, versions in by_base.items():
         b1 = f"{base}B1"
         b2 = f"{base}B2"
         if b1 in versions and b2 in versions:
-            if not dry_run:
-                # Delete B1 claims first
-                supabase_request("DELETE", f"patent_claims?patent_number=eq.{b1}")
-                # Delete B1 patent
-                supabase_request("DELETE", f"patents?patent_number=eq.{b1}")
-            deleted += 1
-            log(f"  {'Would delete' if dry_run else 'Deleted'} {b1} (keeping {b2})")
+            to_delete.append(b1)
+            log(f"  {'Would delete' if dry_run else 'Deleting'} {b1} (keeping {b2})")
+
+    if to_delete and not dry_run:
+        numbers = ",".join(to_delete)
+        # Delete B1 claims first, then the B1 patents
+        supabase_request("DELETE", f"patent_claims?patent_number=in.({numbers})")
+        supabase_request("DELETE", f"patents?patent_number=in.({numbers})")
 
-    return deleted
+    return len(to_delete)
 
 
 def build_rag_fields(dry_run: bool = False) -> int:
-    """Build content_text and claims_text for RAG."""
-    patents = supabase_paginate("patents?select=patent_number,title,abstract")
+    """Build content_text and claims_text for RAG.
+
+    Patents whose stored content_hash already matches are left untouched.
+    """
+    patents = supabase_paginate("patents?select=patent_number,title,abstract,content_hash")
+
+    # Pull every claim once and group by patent in a single pass,
+    # instead of one claims GET per patent
+    claims_by_patent = defaultdict(list)
+    for c in supabase_paginate(
+        "patent_claims?select=patent_number,claim_number,claim_text"
+        "&order=patent_number,claim_number"
+    ):
+        claims_by_patent[c["patent_number"]].append(f"{c['claim_number']}. {c['claim_text']}")
 
     updated = 0
     for patent in patents:
         pn = patent["patent_number"]
 
-        # Get claims for this patent
-        claims = supabase_request(
-            "GET",
-            f"patent_claims?patent_number=eq.{pn}&select=claim_number,claim_text&order=claim_number"
-        )
-
         # Build claims_text
-        claims_text = "\n\n".join(
-            f"{c['claim_number']}. {c['claim_text']}" for c in claims
-        ) if claims else ""
+        claims_text = "\n\n".join(claims_by_patent.get(pn, ()))
 
         # Build content_text
         parts = []
@@ -647,7 +752,11 @@ def build_rag_fields(dry_run: bool = False) -> int:
             parts.append(f"CLAIMS:\n{claims_text}")
 
         content_text = "\n\n".join(parts)
-        content_hash = hashlib.sha256(content_text.encode()).hexdigest() if content_text else None
+        content_hash = compute_hash(content_text) if content_text else None
+
+        # Content unchanged since the last build: nothing to write
+        if content_hash == patent.get("content_hash"):
+            continue
 
         if content_text and not dry_run:
             supabase_request("PATCH", f"patents?patent_number=eq.{pn}", {
@@ -675,6 +784,8 @@ class PatentWorker:
             "deduped": 0,
             "rag_built": 0,
         }
+        # Patent numbers in DB, loaded once in discovery and reused by later stages
+        self.existing: Optional[Set[str]] = None
 
     def run(self, stage: int = None):
         """Run all stages or a specific stage."""
@@ -703,7 +814,7 @@ class PatentWorker:
 
     def stage_discovery(self):
         """Find and insert new patents."""
-        existing = get_existing_patents()
+        self.existing = existing = get_existing_patents()
         log(f"Existing patents in DB: {len(existing)}")
 
         # Fetch from PatentsView
@@ -717,21 +828,22 @@ class PatentWorker:
 
         log(f"  New patents to add: {len(pv_patents)}")
 
-        # Insert new patents
-        for patent in pv_patents:
-            if not self.dry_run:
-                try:
-                    supabase_request("POST", "patents", patent)
-                    self.stats["new_patents"] += 1
-                except Exception as e:
-                    if "duplicate" not in str(e).lower():
-                        log(f"  Error inserting {patent['patent_number']}: {e}")
+        # Upsert in bulk (one request per UPSERT_BATCH_SIZE rows)
+        if pv_patents and not self.dry_run:
+            new_numbers = {p["patent_number"] for p in pv_patents} - existing
+            written = supabase_upsert("patents", pv_patents, "patent_number")
+            if written == len(pv_patents):
+                existing |= new_numbers
+                self.stats["new_patents"] = len(new_numbers)
+            else:
+                # Partial failure: let the claims stage reload what actually landed
+                self.existing = None
 
         log(f"Inserted {self.stats['new_patents']} new patents")
 
     def stage_claims(self):
         """Fetch claims for patents missing them."""
-        missing = get_patents_missing_claims()
+        missing = get_patents_missing_claims(self.existing)
         log(f"Patents missing claims: {len(missing)}")
 
         # Categorize missing patents
@@ -760,11 +872,11 @@ class PatentWorker:
             log("")
             log("Fetching US granted patents via PatentsView...")
             for i, pn in enumerate(us_granted):
-                match = re.match(r'^US(\d+)', pn)
-                if not match:
+                parts = split_us_patent(pn)
+                if not parts:
                     continue
 
-                patent_id = match.group(1)
+                patent_id = parts[0]
                 log(f"  [{i+1}/{len(us_granted)}] Fetching claims for {pn}")
 
                 claims = patentsview_fetch_claims(patent_id)
@@ -775,8 +887,6 @@ class PatentWorker:
                 else:
                     log(f"    -> No claims found")
 
-                time.sleep(PATENTSVIEW_DELAY)
-
         # ===== PHASE 2: International Patents via Google Patents =====
         if international and PLAYWRIGHT_AVAILABLE:
             log("")
@@ -802,8 +912,6 @@ class PatentWorker:
                             log(f"    -> {inserted} claims")
                         else:
                             log(f"    -> No claims found")
-
-                        time.sleep(GOOGLE_PATENTS_DELAY)
                 finally:
                     browser.close()
         elif international and not PLAYWRIGHT_AVAILABLE:
@@ -6,7 +6,10 @@ Extracts text from PDF documents for FCC filings and other regulatory documents.
 Supports multiple extraction methods with fallbacks.
 
 Dependencies:
-    pip install pdfplumber PyPDF2
+    pip install pypdfium2 pdfplumber PyPDF2
+
+Set PDF_BACKEND (pypdfium2, pdfplumber, pypdf2, pdfminer) to try that
+method first, e.g. to A/B extraction quality.
 
 Usage:
     from pdf_extractor import extract_pdf_text
@@ -39,6 +42,54 @@ def log(msg: str):
 # PDF Extraction Methods
 # ============================================================================
 
+# Returned by extract_with_pypdfium2 when PDFium finds no characters on any
+# page: a scanned/image-only PDF that no text extractor can read
+NO_TEXT_LAYER = "No text layer (scanned/image-only PDF)"
+
+
+def extract_with_pypdfium2(pdf_bytes: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extract text using pypdfium2 (PDFium's native text layer; much faster
+    than the pure-Python parsers on large filings).
+    Returns (text, error).
+
+    PDFium is not thread-safe: call from one thread per process (ECFS runs
+    extraction in a process pool).
+
+    Reports NO_TEXT_LAYER when no page has a single character, so
+    extract_pdf_text can skip the slower fallbacks on image-only PDFs.
+    """
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return None, "pypdfium2 not installed"
+
+    try:
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            text_parts = []
+            char_count = 0
+            for i, page in enumerate(pdf):
+                textpage = page.get_textpage()
+                char_count += textpage.count_chars()
+                page_text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                if page_text.strip():
+                    text_parts.append(f"--- Page {i+1} ---\n{page_text}")
+        finally:
+            pdf.close()
+
+        if not char_count:
+            return None, NO_TEXT_LAYER
+        if text_parts:
+            return "\n\n".join(text_parts), None
+        return None, "No text extracted"
+
+    except Exception as e:
+        return None, str(e)
+
+
 def extract_with_pdfplumber(pdf_bytes: bytes) -> Tuple[Optional[str], Optional[str]]:
     """
     Extract text using pdfplumber (best for scanned/image PDFs).
@@ -116,6 +167,17 @@ def extract_with_pdfminer(pdf_bytes: bytes) -> Tuple[Optional[str], Optional[str
 # Main Extraction Functions
 # ============================================================================
 
+# Default order: pypdfium2 first (native, fastest), then pdfplumber (best
+# for complex layouts), PyPDF2, pdfminer. Missing libraries are skipped.
+EXTRACTION_METHODS = {
+    "pypdfium2": extract_with_pypdfium2,
+    "pdfplumber": extract_with_pdfplumber,
+    "pypdf2": extract_with_pypdf2,
+    "pdfminer": extract_with_pdfminer,
+}
+
+PDF_BACKEND = os.environ.get("PDF_BACKEND", "").lower()
+
 def extract_pdf_text(
     pdf_bytes: bytes,
     method: Optional[str] = None,
@@ -126,29 +188,21 @@ def extract_pdf_text(
 
     Args:
         pdf_bytes: Raw PDF content as bytes
-        method: Specific method to use ('pdfplumber', 'pypdf2', 'pdfminer')
-                If None, tries all methods
+        method: Specific method to use ('pypdfium2', 'pdfplumber', 'pypdf2', 'pdfminer')
+                If None, tries all methods (PDF_BACKEND's first)
         fallback: If True, try other methods if preferred fails
 
     Returns:
         Extracted text or empty string if extraction fails
     """
-    methods = []
-
     if method:
-        if method == "pdfplumber":
-            methods = [extract_with_pdfplumber]
-        elif method == "pypdf2":
-            methods = [extract_with_pypdf2]
-        elif method == "pdfminer":
-            methods = [extract_with_pdfminer]
+        methods = [EXTRACTION_METHODS[method]] if method in EXTRACTION_METHODS else []
     else:
-        # Default order: pdfplumber first (best for complex layouts)
-        methods = [
-            extract_with_pdfplumber,
-            extract_with_pypdf2,
-            extract_with_pdfminer,
-        ]
+        methods = list(EXTRACTION_METHODS.values())
+        if PDF_BACKEND in EXTRACTION_METHODS:
+            preferred = EXTRACTION_METHODS[PDF_BACKEND]
+            methods.remove(preferred)
+            methods.insert(0, preferred)
 
     if not fallback:
         methods = methods[:1]
@@ -160,6 +214,10 @@ def extract_pdf_text(
             return clean_extracted_text(text)
         if error:
             errors.append(f"{extract_fn.__name__}: {error}")
+        if error == NO_TEXT_LAYER:
+            # Image-only: pdfplumber/PyPDF2/pdfminer would parse every page
+            # for nothing (needs OCR)
+            break
 
     # All methods failed
     if errors:
@@ -344,7 +402,7 @@ def main():
 
     parser = argparse.ArgumentParser(description="Extract text from PDF files")
     parser.add_argument("input", help="PDF file path or URL")
-    parser.add_argument("--method", choices=["pdfplumber", "pypdf2", "pdfminer"],
+    parser.add_argument("--method", choices=list(EXTRACTION_METHODS),
                        help="Extraction method to use")
     parser.add_argument("--output", "-o", help="Output file (default: stdout)")
     parser.add_argument("--metadata", "-m", action="store_true",
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+On-Disk HTTP Response Cache
+
+SQLite-backed cache of upstream API response bodies keyed by URL, so
+re-running a worker locally (debugging, backfills) doesn't re-fetch
+unchanged endpoints or spend their rate-limit budget. Entries expire
+after a TTL. Workers expose --no-cache, which sets `enabled = False`.
+
+URLs are stored as SHA-256 digests since they often carry API keys.
+CI runners start without a .cache/ directory, so scheduled runs always
+fetch fresh data.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+CACHE_PATH = os.environ.get(
+    "HTTP_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "http_responses.db"),
+)
+DEFAULT_TTL = 3600  # seconds
+
+enabled = True
+
+_db: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+
+def _cache() -> Optional[sqlite3.Connection]:
+    """Open (once) the SQLite cache. Returns None if disabled or it can't be opened.
+
+    Caller must hold _lock.
+    """
+    global _db
+    if not enabled:
+        return None
+    if _db is None:
+        try:
+            os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+            db = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, body BLOB, fetched_at INTEGER)"
+            )
+            _db = db
+        except (sqlite3.Error, OSError) as e:
+            _disable(e)
+            return None
+    return _db
+
+
+def _disable(error: Exception) -> None:
+    """Fall back to no cache for the rest of the run. Caller must hold _lock.
+
+    The cache is only an optimization, so a locked or full database must not
+    surface as a failed fetch.
+    """
+    global enabled
+    print(f"HTTP response cache unavailable: {error}")
+    enabled = False
+
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def get(url: str, ttl: float = DEFAULT_TTL) -> Optional[bytes]:
+    """Return the cached body for url if younger than ttl, else None."""
+    with _lock:
+        db = _cache()
+        if not db:
+            return None
+        try:
+            row = db.execute(
+                "SELECT body, fetched_at FROM responses WHERE key = ?", (_key(url),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            _disable(e)
+            return None
+    if row and time.time() - row[1] < ttl:
+        return row[0]
+    return None
+
+
+def put(url: str, body: bytes) -> None:
+    """Store a successful response body for url."""
+    with _lock:
+        db = _cache()
+        if not db:
+            return
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, fetched_at) VALUES (?, ?, ?)",
+                (_key(url), body, int(time.time())),
+            )
+            db.commit()
+        except sqlite3.Error as e:
+            _disable(e)
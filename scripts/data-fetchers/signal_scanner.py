@@ -187,6 +187,23 @@ def fingerprint(*parts: str) -> str:
 # Module-level counters for run summary
 _stats = {"duplicates": 0, "store_errors": 0}
 
+# Fingerprints already in the signals table — loaded once per run
+_known_fingerprints: Optional[set] = None
+
+
+def known_fingerprints() -> Optional[set]:
+    """Load every stored signal fingerprint once. Returns None if the load fails
+    (store_signal then falls back to a per-signal existence check)."""
+    global _known_fingerprints
+    if _known_fingerprints is None:
+        try:
+            rows = supabase_paginate("signals?select=fingerprint")
+            _known_fingerprints = {r["fingerprint"] for r in rows if r.get("fingerprint")}
+        except Exception as e:
+            log(f"  Could not preload signal fingerprints ({type(e).__name__}): {e}")
+            return None
+    return _known_fingerprints
+
 
 def store_signal(signal: Dict, dry_run: bool = False) -> bool:
     """Store a signal, skip if fingerprint already exists.
@@ -206,12 +223,18 @@ def store_signal(signal: Dict, dry_run: bool = False) -> bool:
 
     try:
         # Check if fingerprint exists
-        existing = supabase_request("GET", f"signals?fingerprint=eq.{fp}&select=id&limit=1")
-        if existing:
+        known = known_fingerprints()
+        if known is not None:
+            exists = fp in known
+        else:
+            exists = bool(supabase_request("GET", f"signals?fingerprint=eq.{fp}&select=id&limit=1"))
+        if exists:
             _stats["duplicates"] += 1
             return False  # Already detected
 
         supabase_request("POST", "signals", signal)
+        if known is not None:
+            known.add(fp)
         return True
     except urllib.error.HTTPError as e:
         log(f"  Error storing signal (HTTPError {e.code}): {e}")
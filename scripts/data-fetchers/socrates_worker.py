@@ -38,6 +38,14 @@ SATELLITE_NAMES = {
 # CelesTrak SOCRATES raw CSV — full dataset, filter locally for our sats
 SOCRATES_CSV_URL = "https://celestrak.org/SOCRATES/sort-minRange.csv"
 
+# CSV columns stored 1:1 as their own fields — left out of raw_cdm. The
+# NORAD_CAT_ID_*/OBJECT_NAME_* pairs stay: sat1_* is always our satellite,
+# so they are the only record of the CSV's original order (which DSE_1/DSE_2
+# refer to), and sat1_name may come from SATELLITE_NAMES instead.
+EXTRACTED_COLUMNS = {"TCA", "TCA_RANGE", "TCA_RELATIVE_SPEED", "MAX_PROB"}
+
+UPSERT_BATCH_SIZE = 200
+
 
 def supabase_request(method, path, data=None, params=None):
     url = f"{SUPABASE_URL}/rest/v1/{path}"
@@ -138,7 +146,7 @@ def parse_and_filter(csv_text):
                 "relative_speed_kms": rel_vel_kms,
                 "collision_probability": collision_prob,
                 "source": "socrates",
-                "raw_cdm": dict(row),
+                "raw_cdm": {k: v for k, v in row.items() if k not in EXTRACTED_COLUMNS},
             })
 
         except (ValueError, KeyError):
@@ -169,7 +177,7 @@ def main():
         return
 
     # Upsert
-    batch_size = 50
+    batch_size = UPSERT_BATCH_SIZE
     total = 0
     for i in range(0, len(records), batch_size):
         batch = records[i : i + batch_size]
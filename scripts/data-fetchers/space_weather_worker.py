@@ -49,14 +49,18 @@ def supabase_request(method, path, data=None, params=None):
         return e.code
 
 
-def fetch_csv(url, retries=3):
-    """Fetch CSV data with retry logic."""
+def fetch_records(url, retries=3):
+    """Fetch and parse a space weather CSV with retry logic.
+
+    The response is decoded and parsed as it streams off the socket, so the
+    full-archive file is never held as bytes + str + StringIO at once.
+    """
     for attempt in range(retries):
         try:
             ctx = ssl.create_default_context()
             req = urllib.request.Request(url, headers={"User-Agent": "ShortGravity/1.0"})
             with urllib.request.urlopen(req, context=ctx, timeout=60) as resp:
-                return resp.read().decode("utf-8")
+                return parse_sw_csv(io.TextIOWrapper(resp, encoding="utf-8", newline=""))
         except Exception as e:
             print(f"  Fetch attempt {attempt + 1} failed: {e}")
             if attempt < retries - 1:
@@ -84,14 +88,14 @@ def safe_int(val):
     return int(f) if f is not None else None
 
 
-def parse_sw_csv(csv_text):
+def parse_sw_csv(lines):
     """
-    Parse CelesTrak space weather CSV.
+    Parse CelesTrak space weather CSV from a text stream or iterable of lines.
     Header-based CSV with columns:
     DATE,BSRN,ND,KP1..KP8,KP_SUM,AP1..AP8,AP_AVG,CP,C9,ISN,
     F10.7_OBS,F10.7_ADJ,F10.7_DATA_TYPE,F10.7_OBS_CENTER81,...
     """
-    reader = csv.DictReader(io.StringIO(csv_text))
+    reader = csv.DictReader(lines)
     records = []
 
     for row in reader:
@@ -172,8 +176,7 @@ def main():
     label = "SW-All (full archive)" if backfill else "SW-Last5Years"
     print(f"[space-weather] Fetching {label}...")
 
-    csv_text = fetch_csv(url)
-    records = parse_sw_csv(csv_text)
+    records = fetch_records(url)
     print(f"[space-weather] Parsed {len(records)} records")
 
     if not records:
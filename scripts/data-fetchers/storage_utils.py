@@ -4,15 +4,18 @@ Supabase Storage Utilities
 
 Provides functions for uploading/downloading documents to Supabase Storage.
 Used by SEC and FCC filing workers for full document preservation.
+Requests go through http_pool, so a worker uploading hundreds of
+attachments reuses one keep-alive connection per thread.
 """
 
 import hashlib
 import json
 import os
-import urllib.request
+import time
 import urllib.error
 from typing import Optional, Tuple
-from datetime import datetime
+
+import http_pool
 
 
 # Configuration
@@ -24,13 +27,29 @@ SEC_BUCKET = "sec-filings"
 FCC_BUCKET = "fcc-filings"
 
 
+_log_second = None
+_log_stamp = ""
+
+
 def log(msg: str):
     """Print with timestamp."""
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+    # Format the timestamp at most once per second; filing workers log per
+    # page/attachment/filing
+    global _log_second, _log_stamp
+    now = int(time.time())
+    if now != _log_second:
+        _log_second = now
+        _log_stamp = time.strftime("%H:%M:%S", time.localtime(now))
+    print(f"[{_log_stamp}] {msg}")
 
 
 def compute_hash(content: str | bytes) -> str:
-    """Compute SHA-256 hash of content."""
+    """Compute SHA-256 hash of content.
+
+    SHA-256 is the fastest hashlib digest on SHA-NI hardware (faster than
+    blake2b/md5 in CPython), and stored content_hash values stay comparable
+    across runs, so there is no cheaper stdlib alternative to switch to.
+    """
     if isinstance(content, str):
         content = content.encode("utf-8")
     return hashlib.sha256(content).hexdigest()
@@ -53,11 +72,9 @@ def _storage_request(
         "Content-Type": content_type,
     }
 
-    req = urllib.request.Request(url, data=data, headers=headers, method=method)
-
     try:
-        with urllib.request.urlopen(req, timeout=60) as response:
-            return response.status, response.read()
+        status, _, body = http_pool.request(method, url, headers, data, timeout=60)
+        return status, body
     except urllib.error.HTTPError as e:
         return e.code, e.read()
 
@@ -100,18 +117,16 @@ def upload_document(
     if upsert:
         headers["x-upsert"] = "true"
 
-    req = urllib.request.Request(url, data=data, headers=headers, method="POST")
-
     try:
-        with urllib.request.urlopen(req, timeout=120) as response:
-            result = json.loads(response.read().decode("utf-8"))
-            return {
-                "success": True,
-                "path": path,
-                "hash": content_hash,
-                "size": size,
-                "key": result.get("Key"),
-            }
+        _, _, body = http_pool.request("POST", url, headers, data, timeout=120)
+        result = json.loads(body.decode("utf-8"))
+        return {
+            "success": True,
+            "path": path,
+            "hash": content_hash,
+            "size": size,
+            "key": result.get("Key"),
+        }
     except urllib.error.HTTPError as e:
         error_body = e.read().decode("utf-8")
         log(f"Storage upload error: {e.code} - {error_body}")
@@ -138,11 +153,9 @@ def download_document(bucket: str, path: str) -> Optional[bytes]:
         "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
     }
 
-    req = urllib.request.Request(url, headers=headers, method="GET")
-
     try:
-        with urllib.request.urlopen(req, timeout=60) as response:
-            return response.read()
+        _, _, body = http_pool.request("GET", url, headers, timeout=60)
+        return body
     except urllib.error.HTTPError as e:
         if e.code == 404:
             return None
@@ -156,11 +169,9 @@ def file_exists(bucket: str, path: str) -> bool:
         "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
     }
 
-    req = urllib.request.Request(url, headers=headers, method="HEAD")
-
     try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            return response.status == 200
+        status, _, _ = http_pool.request("HEAD", url, headers, timeout=10)
+        return status == 200
     except urllib.error.HTTPError:
         return False
 
@@ -172,11 +183,9 @@ def delete_document(bucket: str, path: str) -> bool:
         "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
     }
 
-    req = urllib.request.Request(url, headers=headers, method="DELETE")
-
     try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            return response.status == 200
+        status, _, _ = http_pool.request("DELETE", url, headers, timeout=30)
+        return status == 200
     except urllib.error.HTTPError:
         return False
 
@@ -205,11 +214,9 @@ def list_files(bucket: str, prefix: str = "", limit: int = 100) -> list:
         "sortBy": {"column": "created_at", "order": "desc"},
     }).encode()
 
-    req = urllib.request.Request(url, data=body, headers=headers, method="POST")
-
     try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            return json.loads(response.read().decode("utf-8"))
+        _, _, resp_body = http_pool.request("POST", url, headers, body, timeout=30)
+        return json.loads(resp_body.decode("utf-8"))
     except urllib.error.HTTPError as e:
         log(f"List files error: {e.code}")
         return []
@@ -239,12 +246,10 @@ def get_signed_url(bucket: str, path: str, expires_in: int = 3600) -> Optional[s
     }
 
     body = json.dumps({"expiresIn": expires_in}).encode()
-    req = urllib.request.Request(url, data=body, headers=headers, method="POST")
-
     try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            result = json.loads(response.read().decode("utf-8"))
-            return f"{SUPABASE_URL}/storage/v1{result['signedURL']}"
+        _, _, resp_body = http_pool.request("POST", url, headers, body, timeout=30)
+        result = json.loads(resp_body.decode("utf-8"))
+        return f"{SUPABASE_URL}/storage/v1{result['signedURL']}"
     except urllib.error.HTTPError as e:
         log(f"Signed URL error: {e.code}")
         return None
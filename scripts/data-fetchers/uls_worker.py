@@ -75,6 +75,8 @@ RATE_LIMIT_SECONDS = 1.5
 # Valid filing_system values per fcc_filings CHECK constraint
 VALID_FILING_SYSTEMS = {"ICFS", "ECFS", "ELS"}
 
+UPSERT_BATCH_SIZE = 100  # fcc_filings rows per bulk upsert
+
 
 # ============================================================================
 # HTTP Utilities
@@ -126,7 +128,12 @@ def fetch_bytes(url: str, retries: int = 3) -> bytes:
 # Supabase Operations
 # ============================================================================
 
-def supabase_request(method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
+def supabase_request(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict | List[Dict]] = None,
+    prefer: str = "return=representation",
+) -> Dict:
     """Make Supabase REST API request."""
     if not SUPABASE_SERVICE_KEY:
         raise ValueError("SUPABASE_SERVICE_KEY not set")
@@ -136,7 +143,7 @@ def supabase_request(method: str, endpoint: str, data: Optional[Dict] = None) ->
         "apikey": SUPABASE_SERVICE_KEY,
         "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
         "Content-Type": "application/json",
-        "Prefer": "return=representation",
+        "Prefer": prefer,
     }
 
     body = json.dumps(data).encode() if data else None
@@ -162,28 +169,25 @@ def get_existing_els_filings() -> Set[str]:
         return set()
 
 
-def upsert_fcc_filing(filing: Dict) -> Dict:
-    """Insert or update FCC filing."""
-    file_number = filing.get("file_number")
-    filing_system = filing.get("filing_system", "ELS")
-
-    # URL encode the file number for query
-    encoded_fn = urllib.parse.quote(file_number, safe="")
-
-    # Check if exists
-    existing = supabase_request(
-        "GET",
-        f"fcc_filings?file_number=eq.{encoded_fn}&filing_system=eq.{filing_system}&select=id"
-    )
-
-    if existing:
-        return supabase_request(
-            "PATCH",
-            f"fcc_filings?file_number=eq.{encoded_fn}&filing_system=eq.{filing_system}",
-            filing
-        )
-    else:
-        return supabase_request("POST", "fcc_filings", filing)
+def upsert_fcc_filings(filings: List[Dict]) -> None:
+    """Bulk upsert FCC filings on (filing_system, file_number). Raises on HTTP error.
+
+    PostgREST takes a bulk body's columns from its first row and writes
+    NULL for keys other rows lack, so rows are grouped by key set —
+    a filing without an AI summary must not blank an existing one.
+    """
+    groups: Dict[frozenset, List[Dict]] = {}
+    for filing in filings:
+        groups.setdefault(frozenset(filing), []).append(filing)
+
+    for rows in groups.values():
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            supabase_request(
+                "POST",
+                "fcc_filings?on_conflict=filing_system,file_number",
+                rows[i:i + UPSERT_BATCH_SIZE],
+                prefer="resolution=merge-duplicates,return=minimal",
+            )
 
 
 # ============================================================================
@@ -431,8 +435,18 @@ def discover_all_els_filings() -> List[Dict]:
 # Filing Processing
 # ============================================================================
 
-def process_filing(filing: Dict, dry_run: bool = False, no_summary: bool = False) -> bool:
-    """Process a single ELS filing."""
+def process_filing(
+    filing: Dict,
+    pending: List[Dict],
+    dry_run: bool = False,
+    no_summary: bool = False,
+) -> bool:
+    """
+    Process a single ELS filing.
+
+    The finished fcc_filings row is appended to pending; the caller bulk
+    upserts it with upsert_fcc_filings().
+    """
     file_number = filing.get("file_number")
     if not file_number:
         return False
@@ -511,9 +525,8 @@ def process_filing(filing: Dict, dry_run: bool = False, no_summary: bool = False
             log(f"  ERROR: Invalid filing_system '{db_record.get('filing_system')}' — must be one of {VALID_FILING_SYSTEMS}")
             return False
 
-        # Upsert to database
-        upsert_fcc_filing(db_record)
-        log(f"  ✓ Database updated")
+        pending.append(db_record)
+        log(f"  ✓ Queued for database")
 
         return True
 
@@ -602,18 +615,36 @@ def run_worker(args):
     log("-" * 60)
     success = 0
     failed = 0
+    pending: List[Dict] = []
+
+    def flush() -> None:
+        nonlocal success, failed
+        try:
+            upsert_fcc_filings(pending)
+            log(f"Upserted {len(pending)} filings")
+        except Exception as e:
+            log(f"  ✗ Bulk upsert of {len(pending)} filings failed: {e}")
+            success -= len(pending)
+            failed += len(pending)
+        pending.clear()
 
     for i, filing in enumerate(to_process):
         log(f"[{i+1}/{len(to_process)}]")
 
-        if process_filing(filing, dry_run=args.dry_run, no_summary=args.no_summary):
+        if process_filing(filing, pending, dry_run=args.dry_run, no_summary=args.no_summary):
             success += 1
         else:
             failed += 1
 
+        if len(pending) >= UPSERT_BATCH_SIZE:
+            flush()
+
         if (i + 1) % 10 == 0:
             log(f"Progress: {i+1}/{len(to_process)} ({success} success, {failed} failed)")
 
+    if pending:
+        flush()
+
     log("=" * 60)
     log(f"Completed: {success} success, {failed} failed")
     log("=" * 60)
@@ -10,11 +10,12 @@ Schedule: weekly via GitHub Actions
 import os
 import sys
 import json
-import re
 import urllib.request
 import urllib.parse
 from datetime import datetime, timezone
 
+from cash_patterns import CASH_EQ, OP_BURN, STRIP_COMMAS, TRANSCRIPT_PRO_FORMA
+
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY')
 
@@ -103,21 +104,15 @@ def sync_short_interest():
 
 def extract_proforma_from_transcript(transcript):
     """Extract pro forma cash/liquidity figure from earnings call transcript."""
-    # Look for "$X.X billion" in context of pro forma / liquidity / cash
-    patterns = [
-        # "$3.2 billion in cash and liquidity ... pro forma"
-        r'\$([\d.]+)\s*billion\s+(?:in\s+)?(?:cash(?:\s+and\s+(?:cash\s+equivalents|liquidity))?|pro\s*forma)',
-        # "pro forma ... $3.2 billion"
-        r'pro\s*forma.*?\$([\d.]+)\s*billion',
-        # "cash, cash equivalents, and restricted cash and available liquidity ... $X.X billion"
-        r'cash[,\s]+cash equivalents[,\s]+(?:and\s+)?restricted cash.*?\$([\d.]+)\s*billion',
-        # "$X.X billion on a pro forma basis"
-        r'\$([\d.]+)\s*billion\s+on\s+a\s+pro\s*forma\s+basis',
-    ]
-    for pattern in patterns:
-        m = re.search(pattern, transcript, re.IGNORECASE)
-        if m:
-            return float(m.group(1))
+    text = transcript.lower()
+    # Every pattern needs "billion"; most transcripts stop here
+    if 'billion' not in text:
+        return None
+    for keyword, pattern in TRANSCRIPT_PRO_FORMA:
+        if keyword in text:
+            m = pattern.search(text)
+            if m:
+                return float(m.group(1))
     return None
 
 
@@ -178,14 +173,14 @@ def sync_cash_position():
             print(f"  Parsing {filing_form} filed {filing_date}...")
 
             # Balance sheet cash
-            m = re.search(r'Cash and cash equivalents\s+\$\s*([\d,]+)', content)
+            m = CASH_EQ.search(content)
             if m:
-                balance_sheet_cash = int(m.group(1).replace(',', ''))
+                balance_sheet_cash = int(m.group(1).translate(STRIP_COMMAS))
 
             # Quarterly burn
-            m = re.search(r'Cash used in operating activities\s*\(?\s*([\d,]+)', content, re.IGNORECASE)
+            m = OP_BURN.search(content)
             if m:
-                quarterly_burn = int(m.group(1).replace(',', ''))
+                quarterly_burn = int(m.group(1).translate(STRIP_COMMAS))
 
     # --- Step 3: Determine best date for dedup ---
     best_date = transcript_date or filing_date
@@ -15,14 +15,20 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import sqlite3
 import sys
+import threading
 import time
+import urllib.parse
 import urllib.request
 import urllib.error
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any, Tuple
 
+import http_pool
+
 
 # ── Configuration ────────────────────────────────────────────────────
 
@@ -48,6 +54,29 @@ USER_FIELDS = "username,name"
 MEDIA_FIELDS = "media_key,type,url,preview_image_url,alt_text,width,height,variants"
 EXPANSIONS = "author_id,referenced_tweets.id,attachments.media_keys"
 
+# Haiku calls run in parallel; the bucket keeps them under Anthropic's request rate
+CLASSIFY_WORKERS = 8
+CLASSIFY_BATCH_SIZE = 10  # Tweets per Haiku call in classify_stored_tweets
+ANTHROPIC_RPS = 5
+ANTHROPIC_BUCKET = http_pool.TokenBucket(ANTHROPIC_RPS, burst=ANTHROPIC_RPS)
+
+# Image URL → vision description cache (survives across local backfill runs)
+VISION_CACHE_PATH = os.environ.get(
+    "X_VISION_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "x_vision.db"),
+)
+VISION_FAIL_TTL = 24 * 3600  # Retry broken URLs after a day
+MAX_IMAGE_BYTES = 5_000_000
+
+# Paginated X requests: at most one page request per second
+X_PAGE_BUCKET = http_pool.TokenBucket(1)
+
+# Hot-path patterns, compiled once
+URL_RE = re.compile(r'https?://\S+')
+MEDIA_TAG_RE = re.compile(r'\[(photo|video|gif)[^\]]*\]')
+JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
 
 
 # ── Helpers ──────────────────────────────────────────────────────────
@@ -64,34 +93,51 @@ def supabase_request(method: str, endpoint: str, data: Optional[Dict] = None):
         "Content-Type": "application/json",
         "Prefer": "return=representation",
     }
-    body = json.dumps(data).encode() if data else None
-    req = urllib.request.Request(url, data=body, headers=headers, method=method)
+    body = json.dumps(data, separators=(",", ":")).encode() if data else None
     try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            content = response.read().decode("utf-8")
-            return json.loads(content) if content else {}
+        _, _, content = http_pool.request(method, url, headers, body, timeout=30)
+        return json.loads(content) if content else {}
     except urllib.error.HTTPError as e:
         error_body = e.read().decode("utf-8")
         log(f"Supabase error: {e.code} - {error_body}")
         raise
 
 
+def supabase_upsert(table: str, rows: List[Dict], on_conflict: str) -> None:
+    """Bulk upsert rows in one request (merge-duplicates). Raises on HTTP error."""
+    if not rows:
+        return
+    url = f"{SUPABASE_URL}/rest/v1/{table}?on_conflict={on_conflict}"
+    headers = {
+        "apikey": SUPABASE_SERVICE_KEY,
+        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+        "Content-Type": "application/json",
+        "Prefer": "resolution=merge-duplicates,return=minimal",
+    }
+    try:
+        body = json.dumps(rows, separators=(",", ":")).encode()
+        http_pool.request("POST", url, headers, body, timeout=60)
+    except urllib.error.HTTPError as e:
+        error_body = e.read().decode("utf-8")
+        log(f"Supabase upsert error: {e.code} - {error_body[:300]}")
+        raise
+
+
 def x_api_request(url: str, params: Optional[Dict] = None) -> Tuple[Optional[Dict], Dict]:
     """Make authenticated X API request. Returns (data, headers)."""
     if params:
         query_string = "&".join(f"{k}={urllib.request.quote(str(v))}" for k, v in params.items())
         url = f"{url}?{query_string}"
 
-    req = urllib.request.Request(url, headers={
+    request_headers = {
         "Authorization": f"Bearer {X_BEARER_TOKEN}",
         "User-Agent": "ShortGravityBot/1.0",
-    })
+    }
 
     try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            headers = {k.lower(): v for k, v in response.getheaders()}
-            content = response.read().decode("utf-8")
-            return json.loads(content) if content else None, headers
+        _, response_headers, raw = http_pool.request("GET", url, request_headers, timeout=30)
+        headers = {k.lower(): v for k, v in response_headers.items()}
+        return json.loads(raw) if raw else None, headers
     except urllib.error.HTTPError as e:
         if e.code == 429:
             # Rate limited — read reset header
@@ -131,6 +177,24 @@ def get_existing_ids() -> set:
         return all_ids
 
 
+def mark_existing(records: List[Dict], existing_ids: set, chunk_size: int = 100) -> None:
+    """Add source_ids from this page that are already in the DB to existing_ids.
+
+    One source_id=in.(...) query per chunk of unseen candidates, instead of a
+    per-tweet existence GET. Catches rows written by interrupted/concurrent runs
+    since existing_ids was loaded.
+    """
+    candidates = [f"x_{r['tweet_id']}" for r in records]
+    candidates = [sid for sid in candidates if sid not in existing_ids]
+    for i in range(0, len(candidates), chunk_size):
+        chunk = candidates[i:i + chunk_size]
+        try:
+            rows = supabase_request("GET", f"x_posts?select=source_id&source_id=in.({','.join(chunk)})")
+            existing_ids.update(r["source_id"] for r in rows or [])
+        except Exception:
+            pass
+
+
 def get_latest_tweet_id(username: Optional[str] = None) -> Optional[str]:
     """Get the most recent tweet_id for incremental monitor mode."""
     try:
@@ -161,6 +225,29 @@ def get_oldest_tweet_time(username: str) -> Optional[str]:
 
 # ── AI Classification ────────────────────────────────────────────────
 
+ANTHROPIC_MESSAGES_URL = "https://api.anthropic.com/v1/messages"
+
+
+def anthropic_messages(body: Dict, timeout: float = 30) -> str:
+    """POST to the Anthropic Messages API and return the first text block.
+
+    Goes through http_pool, so each classify thread keeps one warm TLS
+    connection to api.anthropic.com instead of handshaking per call.
+    Throttled by ANTHROPIC_BUCKET. Raises on HTTP/parse errors.
+    """
+    headers = {
+        "x-api-key": ANTHROPIC_API_KEY,
+        "anthropic-version": "2023-06-01",
+        "Content-Type": "application/json",
+    }
+    ANTHROPIC_BUCKET.acquire()
+    _, _, data = http_pool.request(
+        "POST", ANTHROPIC_MESSAGES_URL, headers=headers,
+        body=json.dumps(body, separators=(",", ":")).encode(), timeout=timeout,
+    )
+    return json.loads(data)["content"][0]["text"].strip()
+
+
 def classify_tweet(text: str, author: str) -> Dict[str, Any]:
     """Classify tweet using Haiku. Falls back to rule-based."""
     if ANTHROPIC_API_KEY and len(text) > 20:
@@ -170,9 +257,9 @@ def classify_tweet(text: str, author: str) -> Dict[str, Any]:
     return _rule_classify(text, author)
 
 
-def _haiku_classify(text: str, author: str) -> Optional[Dict[str, Any]]:
-    """Use Claude Haiku for tweet classification."""
-    prompt = f"""You are classifying tweets from the $ASTS (AST SpaceMobile) investor community for a research intelligence database. Your classifications power search, filtering, and sentiment analysis — precision matters.
+# Static halves of the classification prompt — shared by the single-tweet
+# and batch prompts (the batch call sends them as a cacheable system block)
+CLASSIFY_CONTEXT = """You are classifying tweets from the $ASTS (AST SpaceMobile) investor community for a research intelligence database. Your classifications power search, filtering, and sentiment analysis — precision matters.
 
 CONTEXT: AST SpaceMobile is building a space-based cellular broadband network using BlueBird satellites in low Earth orbit. Key topics: satellite launches (SpaceX), FCC/ITU spectrum licensing, MNO partnerships (AT&T, Verizon, Vodafone, Rakuten), direct-to-cell (D2C) technology, BlueWalker 3 test satellite, Abel Avellan (CEO).
 
@@ -181,15 +268,9 @@ KNOWN VOICES:
 - @CatSE___ApeX___ → deep regulatory/FCC analyst, files FOIA requests, reads FCC dockets
 - @thekookreport → community analyst, tracks catalysts and sentiment
 - @spacanpanman → aggregator/narrator of ASTS developments
-- @Defiantclient2 → community member, engagement amplifier
+- @Defiantclient2 → community member, engagement amplifier"""
 
-Tweet by @{author}:
-"{text}"
-
-Classify into this exact JSON:
-{{"sentiment":"...","signal_type":"...","category":"...","tags":[...],"summary":"..."}}
-
-FIELD DEFINITIONS:
+CLASSIFY_FIELDS = """FIELD DEFINITIONS:
 
 sentiment (investor lens — how does this affect the $ASTS thesis?):
 - "bullish" → positive catalyst, progress, good news, optimism about stock/company
@@ -218,101 +299,262 @@ category (primary topic — pick the most specific match):
 tags (extract ALL relevant entities as lowercase strings):
 Include satellite names (bluebird, bluewalker 3), partners (at&t, verizon, vodafone, rakuten), people (abel avellan), agencies (fcc, itu, sec), technologies (d2c, direct-to-cell), launch providers (spacex), competitors (lynk, starlink).
 
-summary: One sentence capturing the key intelligence value. Write it as a research note, not a tweet summary. Focus on WHAT matters and WHY.
+summary: One sentence capturing the key intelligence value. Write it as a research note, not a tweet summary. Focus on WHAT matters and WHY."""
+
+
+def _classify_prompt(text: str, author: str, with_image: bool = False) -> str:
+    """Build the Haiku classification prompt.
+
+    with_image: the tweet's photo is attached to the same message — ask for an
+    image_description field too, so vision + classification is one call.
+    """
+    image_note = ""
+    image_field = ""
+    if with_image:
+        image_note = (
+            "\n\nThe tweet's attached image is included above. Use it when classifying, and describe it in "
+            "\"image_description\": concise, for a research database. If it's a document, filing, chart, or "
+            "screenshot, extract the key text/data. If it's a photo, describe what's shown. 2-3 sentences max."
+        )
+        image_field = '"image_description":"...",'
+
+    return f"""{CLASSIFY_CONTEXT}
+
+Tweet by @{author}:
+"{text}"{image_note}
+
+Classify into this exact JSON:
+{{{image_field}"sentiment":"...","signal_type":"...","category":"...","tags":[...],"summary":"..."}}
+
+{CLASSIFY_FIELDS}
 
 JSON only:"""
 
-    url = "https://api.anthropic.com/v1/messages"
-    headers = {
-        "x-api-key": ANTHROPIC_API_KEY,
-        "anthropic-version": "2023-06-01",
-        "Content-Type": "application/json",
-    }
+
+def _haiku_classify(text: str, author: str) -> Optional[Dict[str, Any]]:
+    """Use Claude Haiku for tweet classification."""
     body = {
         "model": "claude-haiku-4-5-20251001",
         "max_tokens": 200,
-        "messages": [{"role": "user", "content": prompt}],
+        "messages": [{"role": "user", "content": _classify_prompt(text, author)}],
     }
 
-    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers=headers)
     try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            result = json.loads(response.read().decode("utf-8"))
-            raw = result["content"][0]["text"].strip()
-            # Extract JSON from response (handle markdown code blocks)
-            json_match = re.search(r'\{.*\}', raw, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+        raw = anthropic_messages(body)
+        # Extract JSON from response (handle markdown code blocks)
+        json_match = JSON_OBJECT_RE.search(raw)
+        if json_match:
+            return json.loads(json_match.group())
     except Exception as e:
         log(f"    Haiku classification error: {e}")
     return None
 
 
-def describe_image(image_url: str) -> Optional[str]:
-    """Use Haiku vision to describe an image (screenshot, chart, document)."""
-    if not ANTHROPIC_API_KEY or not image_url:
-        return None
+def classify_tweets_batch(items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Classify several (text, author) tweets with one Haiku call.
+
+    The static prompt (context + field definitions) is sent as a system block
+    marked cache_control so repeat batches reuse it. Tweets the batch response
+    doesn't cover — short ones, parse errors, count mismatches — fall back to
+    classify_tweet().
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    batch = [i for i, (text, _) in enumerate(items) if len(text) > 20]
+
+    if ANTHROPIC_API_KEY and len(batch) > 1:
+        tweets = "\n\n".join(
+            f'{n}) Tweet by @{items[i][1]}:\n"{items[i][0]}"' for n, i in enumerate(batch, 1)
+        )
+        body = {
+            "model": "claude-haiku-4-5-20251001",
+            "max_tokens": 200 * len(batch),
+            "system": [{
+                "type": "text",
+                "text": f"{CLASSIFY_CONTEXT}\n\n{CLASSIFY_FIELDS}",
+                "cache_control": {"type": "ephemeral"},
+            }],
+            "messages": [{"role": "user", "content": f"""{tweets}
+
+Classify each tweet above into this exact JSON:
+{{"sentiment":"...","signal_type":"...","category":"...","tags":[...],"summary":"..."}}
+
+Return a JSON array of exactly {len(batch)} objects, in the same order as the tweets.
+
+JSON array only:"""}],
+        }
+        try:
+            raw = anthropic_messages(body, timeout=60)
+            json_match = JSON_ARRAY_RE.search(raw)
+            parsed = json.loads(json_match.group()) if json_match else None
+            if isinstance(parsed, list) and len(parsed) == len(batch):
+                for i, result in zip(batch, parsed):
+                    if isinstance(result, dict):
+                        results[i] = result
+            else:
+                log(f"    Haiku batch returned {len(parsed) if isinstance(parsed, list) else 'no'} results for {len(batch)} tweets")
+        except Exception as e:
+            log(f"    Haiku batch classification error: {e}")
+
+    return [
+        result or classify_tweet(text, author)
+        for result, (text, author) in zip(results, items)
+    ]
+
+
+def vision_image_url(image_url: str) -> str:
+    """Request the CDN's downscaled rendition of an X photo for vision calls.
+
+    pbs.twimg.com serves originals up to 4096px; name=medium caps the long
+    edge at 1200px, which is plenty for describing a screenshot or chart and
+    cuts the bytes Anthropic has to fetch and the billed image tokens.
+    """
+    parts = urllib.parse.urlsplit(image_url)
+    if parts.netloc != "pbs.twimg.com" or not parts.path.startswith("/media/"):
+        return image_url
+    path, dot, ext = parts.path.rpartition(".")
+    if not dot or "/" in ext:
+        return image_url
+    query = urllib.parse.urlencode({"format": ext, "name": "medium"})
+    return urllib.parse.urlunsplit((parts.scheme, parts.netloc, path, query, ""))
+
+
+_vision_db: Optional[sqlite3.Connection] = None
+_vision_lock = threading.Lock()
+
+
+def _vision_cache() -> Optional[sqlite3.Connection]:
+    """Open (once) the SQLite vision cache. Returns None if it can't be opened."""
+    global _vision_db
+    if _vision_db is None:
+        try:
+            os.makedirs(os.path.dirname(VISION_CACHE_PATH), exist_ok=True)
+            db = sqlite3.connect(VISION_CACHE_PATH, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS vision_cache "
+                "(url TEXT PRIMARY KEY, description TEXT, fetched_at INTEGER, status TEXT)"
+            )
+            _vision_db = db
+        except sqlite3.Error as e:
+            log(f"    Vision cache unavailable: {e}")
+            return None
+    return _vision_db
+
+
+def _vision_cache_get(image_url: str) -> Tuple[bool, Optional[str]]:
+    """Look up a cached description. Returns (hit, description).
+
+    A cached failure younger than VISION_FAIL_TTL is a hit with no description.
+    """
+    db = _vision_cache()
+    if not db:
+        return False, None
+    with _vision_lock:
+        row = db.execute(
+            "SELECT description, fetched_at, status FROM vision_cache WHERE url = ?",
+            (image_url,),
+        ).fetchone()
+    if row:
+        description, fetched_at, status = row
+        if status == "ok":
+            return True, description
+        if time.time() - fetched_at < VISION_FAIL_TTL:
+            return True, None
+    return False, None
+
+
+def _vision_cache_put(image_url: str, description: Optional[str]) -> None:
+    db = _vision_cache()
+    if not db:
+        return
+    with _vision_lock:
+        db.execute(
+            "INSERT OR REPLACE INTO vision_cache (url, description, fetched_at, status) VALUES (?, ?, ?, ?)",
+            (image_url, description, int(time.time()), "ok" if description else "fail"),
+        )
+        db.commit()
+
+
+def _check_image(image_url: str) -> Optional[str]:
+    """HEAD-check an image for a vision call. Returns the URL to send, or None.
+
+    Anthropic fetches the image itself (URL image source), so only headers
+    are read here — enough to reject non-images and anything over 5MB.
+    """
+    image_url = vision_image_url(image_url)
 
-    # Fetch image
     try:
-        req = urllib.request.Request(image_url, headers={
-            "User-Agent": "ShortGravityBot/1.0",
-        })
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            content_type = resp.headers.get("Content-Type", "image/jpeg")
-            if not content_type.startswith("image/"):
-                return None
-            image_data = resp.read()
-            if len(image_data) > 5_000_000:  # Skip >5MB
-                return None
-            import base64
-            b64 = base64.b64encode(image_data).decode()
+        _, headers, _ = http_pool.request(
+            "HEAD", image_url, {"User-Agent": "ShortGravityBot/1.0"}, timeout=10,
+        )
     except Exception as e:
-        log(f"    Image fetch failed: {e}")
+        log(f"    Image check failed: {e}")
+        return None
+
+    if not headers.get("Content-Type", "image/jpeg").startswith("image/"):
+        return None
+    length = headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > MAX_IMAGE_BYTES:  # Skip >5MB
         return None
+    return image_url
+
+
+def describe_and_classify(image_url: str, text: str, author: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Describe a tweet's photo and classify the tweet in a single Haiku call.
+
+    Returns (image_description, classification). Descriptions are cached by URL
+    in SQLite; on a cache hit only the text classification call is made.
+    Images that fail the HEAD check are cached as failures for VISION_FAIL_TTL.
+    """
+    hit, description = _vision_cache_get(image_url) if ANTHROPIC_API_KEY else (True, None)
+    if hit:
+        if description:
+            text = text.rstrip() + f"\n[image content: {description}]"
+        return description, classify_tweet(text, author)
+
+    source_url = _check_image(image_url)
+    if not source_url:
+        _vision_cache_put(image_url, None)
+        return None, classify_tweet(text, author)
 
-    # Vision call
     body = {
         "model": "claude-haiku-4-5-20251001",
-        "max_tokens": 300,
+        "max_tokens": 500,
         "messages": [{
             "role": "user",
             "content": [
-                {
-                    "type": "image",
-                    "source": {"type": "base64", "media_type": content_type, "data": b64},
-                },
-                {
-                    "type": "text",
-                    "text": "Describe this image concisely for a research database. If it's a document, filing, chart, or screenshot, extract the key text/data. If it's a photo, describe what's shown. Focus on factual content. 2-3 sentences max.",
-                },
+                {"type": "image", "source": {"type": "url", "url": source_url}},
+                {"type": "text", "text": _classify_prompt(text, author, with_image=True)},
             ],
         }],
     }
 
-    req = urllib.request.Request(
-        "https://api.anthropic.com/v1/messages",
-        data=json.dumps(body).encode(),
-        headers={
-            "x-api-key": ANTHROPIC_API_KEY,
-            "anthropic-version": "2023-06-01",
-            "Content-Type": "application/json",
-        },
-    )
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            result = json.loads(resp.read())
-            return result["content"][0]["text"].strip()
+        raw = anthropic_messages(body)
+        json_match = JSON_OBJECT_RE.search(raw)
+        if json_match:
+            result = json.loads(json_match.group())
+            description = (result.pop("image_description", None) or "").strip() or None
+            _vision_cache_put(image_url, description)
+            return description, result
     except Exception as e:
-        log(f"    Vision describe failed: {e}")
-        return None
+        log(f"    Vision classify failed: {e}")
+
+    # Transient API failure — don't cache, just classify the text
+    return None, classify_tweet(text, author)
 
 
 def is_thin_content(text: str) -> bool:
     """Check if tweet text is too thin to be useful (mostly links/short)."""
-    stripped = re.sub(r'https?://\S+', '', text).strip()
+    # Fast paths: stripping only shortens text, and without a URL or media
+    # tag neither regex can match
+    if len(text) < 30:
+        return True
+    if "http" not in text and "[" not in text:
+        return len(text.strip()) < 30
+    stripped = URL_RE.sub('', text).strip()
     # Remove media tags we added
-    stripped = re.sub(r'\[(photo|video|gif)[^\]]*\]', '', stripped).strip()
+    stripped = MEDIA_TAG_RE.sub('', stripped).strip()
     return len(stripped) < 30
 
 
@@ -515,36 +757,25 @@ def store_tweet(record: Dict, existing_ids: set, dry_run: bool = False,
                 classify: bool = True) -> str:
     """Store a single tweet. Optionally classify with Haiku. Returns: 'saved', 'skipped', or 'failed'."""
     source_id = f"x_{record['tweet_id']}"
+    # Callers refresh existing_ids per page via mark_existing()
     if source_id in existing_ids:
         return "skipped"
 
-    # Check DB directly to catch tweets saved by previous interrupted runs
-    try:
-        check = supabase_request("GET", f"x_posts?select=id&source_id=eq.{source_id}&limit=1")
-        if check and len(check) > 0:
-            existing_ids.add(source_id)
-            return "skipped"
-    except Exception:
-        pass
-
-    # Enrich image-only tweets with vision descriptions
-    content_text = record["content_text"]
-    media = record.get("media") or []
-    photos = [m for m in media if m.get("type") == "photo"]
-    if photos and is_thin_content(content_text) and classify:
-        photo_url = photos[0].get("url") or photos[0].get("preview_url")
-        if photo_url:
-            desc = describe_image(photo_url)
+    # Classify only if requested (skip during fast scrape). Image-only tweets
+    # get their photo described in the same Haiku call.
+    classification = {}
+    if classify:
+        content_text = record["content_text"]
+        media = record.get("media") or []
+        photos = [m for m in media if m.get("type") == "photo"]
+        photo_url = (photos[0].get("url") or photos[0].get("preview_url")) if photos else None
+        if photo_url and is_thin_content(content_text):
+            desc, classification = describe_and_classify(photo_url, content_text, record["author_username"])
             if desc:
-                content_text = content_text.rstrip() + f"\n[image content: {desc}]"
-                record["content_text"] = content_text
+                record["content_text"] = content_text.rstrip() + f"\n[image content: {desc}]"
                 log(f"    Image described: {desc[:60]}...")
-
-    # Classify only if requested (skip during fast scrape)
-    if classify:
-        classification = classify_tweet(record["content_text"], record["author_username"])
-    else:
-        classification = {}
+        else:
+            classification = classify_tweet(content_text, record["author_username"])
 
     row = {
         "source_id": source_id,
@@ -586,34 +817,81 @@ def store_tweet(record: Dict, existing_ids: set, dry_run: bool = False,
         return "failed"
 
 
+_store_pool: Optional[ThreadPoolExecutor] = None
+
+
+def store_page(records: List[Dict], existing_ids: set, dry_run: bool = False,
+               classify: bool = True) -> List[str]:
+    """store_tweet() a page of records concurrently. Returns each record's result.
+
+    Each tweet is independent I/O (Haiku, then a Supabase POST), so the page
+    fans out over CLASSIFY_WORKERS long-lived threads — long-lived so their
+    http_pool keep-alive connections survive from page to page.
+    """
+    global _store_pool
+    if _store_pool is None:
+        _store_pool = ThreadPoolExecutor(max_workers=CLASSIFY_WORKERS, thread_name_prefix="store")
+    return list(_store_pool.map(
+        lambda record: store_tweet(record, existing_ids, dry_run, classify=classify),
+        records,
+    ))
+
+
+# Columns store_tweet inserts — selected in full so a bulk upsert of
+# classified rows carries every column the insert path needs
+STORED_ROW_COLUMNS = (
+    "source_id,tweet_id,author_id,author_username,author_name,content_text,published_at,"
+    "metrics,conversation_id,in_reply_to_id,is_thread_root,search_query,url"
+)
+
+
+def _classify_stored_batch(rows: List[Dict]) -> List[Dict]:
+    """Classify stored tweets in one Haiku call. Returns rows merged with their classification."""
+    classifications = classify_tweets_batch([(r["content_text"], r["author_username"]) for r in rows])
+    return [
+        {
+            **row,
+            "summary": classification.get("summary"),
+            "sentiment": classification.get("sentiment"),
+            "signal_type": classification.get("signal_type"),
+            "category": classification.get("category"),
+            "tags": classification.get("tags", []),
+        }
+        for row, classification in zip(rows, classifications)
+    ]
+
+
 def classify_stored_tweets(username: Optional[str] = None, batch_size: int = 50):
-    """Classify tweets already in DB that have no sentiment (unclassified). Haiku only, no X API cost."""
-    query = "x_posts?select=id,content_text,author_username&sentiment=is.null&order=published_at.asc"
+    """Classify tweets already in DB that have no sentiment (unclassified). Haiku only, no X API cost.
+
+    Each batch is split into CLASSIFY_BATCH_SIZE-tweet Haiku calls that run
+    concurrently (CLASSIFY_WORKERS threads, throttled by ANTHROPIC_BUCKET), then
+    written back with one bulk upsert on source_id.
+    """
+    query = f"x_posts?select={STORED_ROW_COLUMNS}&sentiment=is.null&order=published_at.asc"
     if username:
         query += f"&author_username=eq.{username}"
     query += f"&limit={batch_size}"
 
     total = 0
-    while True:
-        rows = supabase_request("GET", query)
-        if not rows:
-            break
+    with ThreadPoolExecutor(max_workers=CLASSIFY_WORKERS) as pool:
+        while True:
+            rows = supabase_request("GET", query)
+            if not rows:
+                break
 
-        for row in rows:
-            classification = classify_tweet(row["content_text"], row["author_username"])
+            chunks = [rows[i:i + CLASSIFY_BATCH_SIZE] for i in range(0, len(rows), CLASSIFY_BATCH_SIZE)]
+            classified = [row for chunk in pool.map(_classify_stored_batch, chunks) for row in chunk]
             try:
-                supabase_request("PATCH", f"x_posts?id=eq.{row['id']}", {
-                    "summary": classification.get("summary"),
-                    "sentiment": classification.get("sentiment"),
-                    "signal_type": classification.get("signal_type"),
-                    "category": classification.get("category"),
-                    "tags": classification.get("tags", []),
-                })
-                total += 1
-                if total % 50 == 0:
-                    log(f"    Classified {total} tweets...")
+                supabase_upsert("x_posts", classified, on_conflict="source_id")
             except Exception as e:
-                log(f"    Classify error on id={row['id']}: {e}")
+                log(f"    Classify batch write failed: {e}")
+                break
+
+            prev = total
+            total += len(classified)
+            if total // 50 > prev // 50:
+                log(f"    Classified {total} tweets...")
 
     log(f"    Classification complete: {total} tweets classified")
     return total
@@ -622,6 +900,36 @@ def classify_stored_tweets(username: Optional[str] = None, batch_size: int = 50)
 # ── Run ──────────────────────────────────────────────────────────────
 
 
+def _iter_pages(url: str, params: Dict[str, Any], token_param: str, max_pages: int = 0):
+    """Yield (page_number, data) for each non-empty X API results page.
+
+    The next page is requested on a background thread as soon as its token is
+    known, so fetching page N+1 overlaps storing/classifying page N.
+    X_PAGE_BUCKET keeps page requests at the old one-per-second pace.
+    """
+    def fetch(token: Optional[str]) -> Optional[Dict]:
+        page_params = dict(params)
+        if token:
+            page_params[token_param] = token
+        X_PAGE_BUCKET.acquire()
+        data, _ = x_api_request(url, page_params)
+        return data
+
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        future = prefetch.submit(fetch, None)
+        pages = 0
+        while future:
+            data = future.result()
+            if not data or data.get("meta", {}).get("result_count", 0) == 0:
+                return
+            pages += 1
+            next_token = data["meta"].get("next_token")
+            future = None
+            if next_token and not (max_pages > 0 and pages >= max_pages):
+                future = prefetch.submit(fetch, next_token)
+            yield pages, data
+
+
 def _fetch_user_timeline(username: str, keyword_filter: Optional[str],
                          existing_ids: set, since_id: Optional[str],
                          dry_run: bool, max_pages: int = 0,
@@ -645,39 +953,25 @@ def _fetch_user_timeline(username: str, keyword_filter: Optional[str],
     skipped = 0
     failed = 0
     filtered_out = 0
-    next_token = None
-    pages = 0
 
-    while True:
-        pages += 1
-        if max_pages > 0 and pages > max_pages:
-            log(f"    Reached max pages ({max_pages})")
-            break
-        # Fetch timeline page
-        timeline_url = f"https://api.x.com/2/users/{user_id}/tweets"
-        params: Dict[str, Any] = {
-            "max_results": 100,
-            "tweet.fields": TWEET_FIELDS,
-            "user.fields": USER_FIELDS,
-            "media.fields": MEDIA_FIELDS,
-            "expansions": EXPANSIONS,
-            "exclude": "retweets",
-        }
-        if since_id:
-            params["since_id"] = since_id
-        if end_time:
-            params["end_time"] = end_time
-        if next_token:
-            params["pagination_token"] = next_token
-
-        data, _ = x_api_request(timeline_url, params)
-        if not data:
-            break
-
-        meta = data.get("meta", {})
-        result_count = meta.get("result_count", 0)
-        if result_count == 0:
-            break
+    # Fetch timeline pages
+    timeline_url = f"https://api.x.com/2/users/{user_id}/tweets"
+    params: Dict[str, Any] = {
+        "max_results": 100,
+        "tweet.fields": TWEET_FIELDS,
+        "user.fields": USER_FIELDS,
+        "media.fields": MEDIA_FIELDS,
+        "expansions": EXPANSIONS,
+        "exclude": "retweets",
+    }
+    if since_id:
+        params["since_id"] = since_id
+    if end_time:
+        params["end_time"] = end_time
+
+    for pages, data in _iter_pages(timeline_url, params, "pagination_token", max_pages):
+        meta = data["meta"]
+        result_count = meta["result_count"]
 
         # Inject user info into includes if not present
         includes = data.get("includes", {})
@@ -693,16 +987,17 @@ def _fetch_user_timeline(username: str, keyword_filter: Optional[str],
         data["includes"] = includes
 
         records = parse_tweets(data, f"@{username}")
+        mark_existing(records, existing_ids)
         page_saved = 0
         page_filtered = 0
-        for record in records:
-            # Apply keyword filter
-            if keyword_filter and keyword_filter.lower() not in record["content_text"].lower():
-                filtered_out += 1
-                page_filtered += 1
-                continue
-
-            result = store_tweet(record, existing_ids, dry_run, classify=classify)
+        # Apply keyword filter
+        if keyword_filter:
+            keep = [r for r in records if keyword_filter.lower() in r["content_text"].lower()]
+            page_filtered = len(records) - len(keep)
+            filtered_out += page_filtered
+            records = keep
+
+        for result in store_page(records, existing_ids, dry_run, classify):
             if result == "saved":
                 saved += 1
                 page_saved += 1
@@ -713,11 +1008,10 @@ def _fetch_user_timeline(username: str, keyword_filter: Optional[str],
 
         log(f"    p{pages}: {result_count} fetched, {page_saved} saved, {page_filtered} filtered | total: {saved} saved, {filtered_out} filtered")
 
-        next_token = meta.get("next_token")
-        if not next_token:
+        if not meta.get("next_token"):
             log(f"    No more pages — backfill complete")
-            break
-        time.sleep(1)
+        elif max_pages > 0 and pages >= max_pages:
+            log(f"    Reached max pages ({max_pages})")
 
     log(f"    @{username} DONE: {saved} saved, {skipped} skipped, {filtered_out} filtered out")
     return saved, skipped, failed
@@ -748,44 +1042,28 @@ def _search_archive(username: str, user_id: str, existing_ids: set,
     saved = 0
     skipped = 0
     failed = 0
-    next_token = None
-    pages = 0
+    url = "https://api.x.com/2/tweets/search/all"
+    params: Dict[str, Any] = {
+        "query": query,
+        "max_results": 500,
+        "tweet.fields": TWEET_FIELDS,
+        "user.fields": USER_FIELDS,
+        "media.fields": MEDIA_FIELDS,
+        "expansions": EXPANSIONS,
+    }
+    if start_time:
+        params["start_time"] = start_time
+    if end_time:
+        params["end_time"] = end_time
 
-    while True:
-        pages += 1
-        if max_pages > 0 and pages > max_pages:
-            log(f"    Reached max pages ({max_pages})")
-            break
-
-        url = "https://api.x.com/2/tweets/search/all"
-        params: Dict[str, Any] = {
-            "query": query,
-            "max_results": 500,
-            "tweet.fields": TWEET_FIELDS,
-            "user.fields": USER_FIELDS,
-            "media.fields": MEDIA_FIELDS,
-            "expansions": EXPANSIONS,
-        }
-        if start_time:
-            params["start_time"] = start_time
-        if end_time:
-            params["end_time"] = end_time
-        if next_token:
-            params["next_token"] = next_token
-
-        data, _ = x_api_request(url, params)
-        if not data:
-            break
-
-        meta = data.get("meta", {})
-        result_count = meta.get("result_count", 0)
-        if result_count == 0:
-            break
+    for pages, data in _iter_pages(url, params, "next_token", max_pages):
+        meta = data["meta"]
+        result_count = meta["result_count"]
 
         records = parse_tweets(data, f"search:@{username}")
+        mark_existing(records, existing_ids)
         page_saved = 0
-        for record in records:
-            result = store_tweet(record, existing_ids, dry_run, classify=classify)
+        for result in store_page(records, existing_ids, dry_run, classify):
             if result == "saved":
                 saved += 1
                 page_saved += 1
@@ -796,11 +1074,10 @@ def _search_archive(username: str, user_id: str, existing_ids: set,
 
         log(f"    p{pages}: {result_count} fetched, {page_saved} saved | total: {saved} saved, {skipped} skipped")
 
-        next_token = meta.get("next_token")
-        if not next_token:
+        if not meta.get("next_token"):
             log(f"    No more pages — archive search complete")
-            break
-        time.sleep(1)
+        elif max_pages > 0 and pages >= max_pages:
+            log(f"    Reached max pages ({max_pages})")
 
     log(f"    @{username} DONE: {saved} saved, {skipped} skipped")
     return saved, skipped, failed
@@ -809,6 +1086,7 @@ def _search_archive(username: str, user_id: str, existing_ids: set,
 # ── Main ─────────────────────────────────────────────────────────────
 
 def run_worker():
+    global CLASSIFY_WORKERS, CLASSIFY_BATCH_SIZE, ANTHROPIC_BUCKET, VISION_CACHE_PATH
     parser = argparse.ArgumentParser(description="X/Twitter ASTS Intelligence Worker")
     parser.add_argument("--dry-run", action="store_true", help="Parse and classify but don't store")
     parser.add_argument("--account", type=str, help="Target a single account username")
@@ -820,7 +1098,19 @@ def run_worker():
     parser.add_argument("--start-time", type=str, help="Only fetch tweets after this ISO timestamp")
     parser.add_argument("--no-classify", action="store_true", help="Fast scrape — store raw, skip Haiku classification")
     parser.add_argument("--classify-only", action="store_true", help="Classify unclassified tweets in DB (no X API cost)")
+    parser.add_argument("--workers", type=int, default=CLASSIFY_WORKERS, help=f"Concurrent store/classify threads (default {CLASSIFY_WORKERS})")
+    parser.add_argument("--rate-limit-rps", type=float, default=ANTHROPIC_RPS, help=f"Max Anthropic requests per second (default {ANTHROPIC_RPS})")
+    parser.add_argument("--batch", type=int, default=CLASSIFY_BATCH_SIZE, help=f"Tweets per Haiku call in --classify-only (default {CLASSIFY_BATCH_SIZE})")
+    parser.add_argument("--cache-db", type=str, default=VISION_CACHE_PATH, help="SQLite vision cache path")
     args = parser.parse_args()
+    if args.rate_limit_rps <= 0:
+        parser.error("--rate-limit-rps must be greater than 0")
+
+    # Tuning knobs read by the store/classify helpers
+    CLASSIFY_WORKERS = max(1, args.workers)
+    CLASSIFY_BATCH_SIZE = max(1, args.batch)
+    ANTHROPIC_BUCKET = http_pool.TokenBucket(args.rate_limit_rps, burst=max(1, int(args.rate_limit_rps)))
+    VISION_CACHE_PATH = args.cache_db
 
     if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
         log("ERROR: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set")